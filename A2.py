@@ -5,6 +5,11 @@
 # 2. Write your program here:
 import random
 import math
+import array
+import itertools
+import collections
+import concurrent.futures
+import os
 
 #Global variables
 MIN_LAT = -90 
@@ -13,6 +18,33 @@ MIN_LONG = -180
 MAX_LONG = 180
 EARTH_RADIUS = 6378
 STORM_STEPS = 5
+MATRIX_CHUNK_ROWS = 256
+WAVE_CHANCE = 0.20
+WAYPOINT_RADIUS = 10.0
+
+#Mission success estimates: voyages per batch, largest number of
+#voyages, width of the distance buckets of a sweep (km), and the normal
+#quantile of the confidence interval (95%)
+SUCCESS_BATCH = 10000
+MAX_VOYAGES = 1000000
+DISTANCE_BUCKET_KM = 25
+CONFIDENCE_Z = 1.96
+
+#Side of the cubes that SpatialIndex sorts points into (km), and the
+#slack added to its searches to cover the rounding to 2 decimals
+SPATIAL_CELL_KM = 50
+SPATIAL_SLACK_KM = 0.02
+
+#Route planning: neighbours tried by the improvement moves, rounds of
+#improvement, and waypoint sets whose distances are kept
+ROUTE_NEIGHBOURS = 8
+ROUTE_PASSES = 50
+ROUTE_CACHE_SIZE = 8
+
+#Fleet vessel states
+SAILING = 0
+REACHED = 1
+CAUGHT_BY_STORM = 2
 
 def degrees_to_radians(degrees: float):
     '''
@@ -36,6 +68,78 @@ def degrees_to_radians(degrees: float):
     radians = degrees * math.pi/180
     return round(radians, 2)
 
+class RandomStreams:
+    '''
+    Independent random generators derived from one seed.
+
+    Each stream is a random.Random seeded from the seed and a key (for
+    example a worker, vessel or game number), so work split across
+    processes or threads draws the same numbers whatever order it runs
+    in, and the whole run is reproduced from the seed alone.
+
+    Parameters:
+        seed (int): Seed of the whole run.
+
+    Examples:
+        >>> streams = RandomStreams(2024)
+        >>> same = RandomStreams(2024)
+        >>> streams.stream(7).random() == same.stream(7).random()
+        True
+        >>> streams.stream(7).random() == streams.stream(8).random()
+        False
+    '''
+
+    def __init__(self, seed: int):
+        self.seed = seed
+
+    def stream(self, *key):
+        '''
+        Return a new generator for the given key. Asking again for the
+        same key starts the same sequence over.
+
+        Parameters:
+            key: Ints or strings naming the stream, such as ("vessel", 3).
+
+        Returns:
+            random.Random: Generator of that stream.
+        '''
+
+        # A str seed is hashed with SHA-512, so nearby keys still give
+        # unrelated sequences
+        return random.Random(repr((self.seed,) + key))
+
+    def streams(self, count: int, *key):
+        '''
+        Return count generators, one for each number 0 to count - 1
+        appended to key.
+        '''
+
+        return [self.stream(*key, number) for number in range(count)]
+
+def random_floats(rng, count: int):
+    '''
+    Draw count floats in [0, 1) at once, in the same order as count
+    calls to rng.random().
+
+    Parameters:
+        rng (random.Random): Generator to draw from.
+        count (int): Number of floats.
+
+    Returns:
+        array.array: The floats, as doubles.
+
+    Examples:
+        >>> rng = random.Random(5)
+        >>> list(random_floats(random.Random(5), 2)) == \
+        [rng.random(), rng.random()]
+        True
+        >>> len(random_floats(random, 4))
+        4
+    '''
+
+    draw = rng.random
+    return array.array('d', [draw() for i in range(count)])
+
 def get_valid_coordinate(val_name: str, min_float: float, max_float: float):
     '''
     Ask the user for a coordinate until a valid number 
@@ -144,7 +248,176 @@ def distance_two_points(lat_1: float, long_1: float,\
     d = EARTH_RADIUS * c
     return round(d, 2)
 
-def apply_wave_impact(position: float, min_float: float, max_float: float):
+def prepare_points(latitudes: list, longitudes: list, exact: bool):
+    '''
+    Convert coordinates once for the batch distance functions.
+
+    Parameters:
+        latitudes (list): Latitudes in degrees.
+        longitudes (list): Longitudes in degrees.
+        exact (bool): If True, give unit vectors (x, y, z) of the points;
+        otherwise give (latitude, longitude, cos(latitude)) in radians
+        rounded like degrees_to_radians.
+
+    Returns:
+        list: One tuple per point.
+
+    Examples:
+        >>> prepare_points([180], [90], False)
+        [(3.14, 1.57, -0.9999987317275395)]
+        >>> prepare_points([0], [0], True)
+        [(1.0, 0.0, 0.0)]
+    '''
+
+    points = []
+    for latitude, longitude in zip(latitudes, longitudes):
+        if exact:
+            latitude = math.radians(latitude)
+            longitude = math.radians(longitude)
+            cos_lat = math.cos(latitude)
+            points.append((cos_lat * math.cos(longitude), \
+            cos_lat * math.sin(longitude), math.sin(latitude)))
+        else:
+            latitude = degrees_to_radians(latitude)
+            longitude = degrees_to_radians(longitude)
+            points.append((latitude, longitude, math.cos(latitude)))
+    return points
+
+def paired_distances(origins, points, exact: bool):
+    '''
+    Compute the distance from each prepared origin to the prepared
+    point at the same position.
+
+    In compatibility mode (exact False) every step matches
+    distance_two_points, so the results are the same to the last bit.
+    In exact mode the distance comes from the chord between the unit
+    vectors, which needs no trigonometry per pair and is not rounded.
+
+    Parameters:
+        origins (iterable): Points from prepare_points.
+        points (iterable): Points from prepare_points, in the same mode.
+        exact (bool): Mode the points were prepared in.
+
+    Returns:
+        array.array: Distances in kilometers, as doubles.
+    '''
+
+    if exact:
+        diameter = 2 * EARTH_RADIUS
+        return array.array('d', [diameter * math.asin(min(1.0, \
+        math.sqrt((x_1 - x_2) ** 2 + (y_1 - y_2) ** 2 + \
+        (z_1 - z_2) ** 2) / 2)) for (x_1, y_1, z_1), (x_2, y_2, z_2) \
+        in zip(origins, points)])
+
+    sin = math.sin
+    sqrt = math.sqrt
+    atan2 = math.atan2
+    distances = array.array('d')
+    for (lat_1, long_1, cos_1), (lat_2, long_2, cos_2) \
+    in zip(origins, points):
+        a = ((sin((lat_2 - lat_1) / 2)) ** 2) \
+        + cos_1 * cos_2 * ((sin((long_2 - long_1) / 2)) ** 2)
+        distances.append(round(EARTH_RADIUS * \
+        (2 * atan2(sqrt(a), sqrt(1 - a))), 2))
+    return distances
+
+def distances_to_point(latitude: float, longitude: float, \
+latitudes: list, longitudes: list, exact: bool = False):
+    '''
+    Compute the great-circle distances from one point to many points.
+
+    Parameters:
+        latitude (float): Latitude of the starting point in degrees.
+        longitude (float): Longitude of the starting point in degrees.
+        latitudes (list): Latitudes of the other points in degrees.
+        longitudes (list): Longitudes of the other points in degrees.
+        exact (bool): If False (the default), give the same rounded
+        results as distance_two_points; if True, use full precision.
+
+    Returns:
+        array.array: Distances in kilometers, one per point.
+
+    Examples:
+        >>> distances_to_point(45.508888, -73.561668, \
+        [19.432608, 45.508888], [-99.133209, -73.561668])
+        array('d', [3723.31, 0.0])
+        >>> distances_to_point(0, 0, [0], [1], exact=True)
+        array('d', [111.31709969219834])
+    '''
+
+    origin = prepare_points([latitude], [longitude], exact)[0]
+    points = prepare_points(latitudes, longitudes, exact)
+    return paired_distances(itertools.repeat(origin), points, exact)
+
+def distance_matrix_chunks(latitudes_1: list, longitudes_1: list, \
+latitudes_2: list, longitudes_2: list, exact: bool = False, \
+chunk_rows: int = MATRIX_CHUNK_ROWS):
+    '''
+    Yield the distance matrix between two sets of points a few rows at a
+    time, so that only chunk_rows rows are held in memory at once.
+
+    Parameters:
+        latitudes_1 (list): Latitudes of the row points in degrees.
+        longitudes_1 (list): Longitudes of the row points in degrees.
+        latitudes_2 (list): Latitudes of the column points in degrees.
+        longitudes_2 (list): Longitudes of the column points in degrees.
+        exact (bool): Full precision instead of distance_two_points
+        rounding.
+        chunk_rows (int): Rows per chunk.
+
+    Returns:
+        generator: (first row index, list of rows) pairs, where each row
+        is an array.array of distances in kilometers.
+
+    Examples:
+        >>> for start, rows in distance_matrix_chunks([0, 10, 20], \
+        [0, 0, 0], [0], [0], chunk_rows=2):
+        ...     print(start, [list(row) for row in rows])
+        0 [[0.0], [1084.26]]
+        2 [[2232.3]]
+    '''
+
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1")
+    points = prepare_points(latitudes_2, longitudes_2, exact)
+    for start in range(0, len(latitudes_1), chunk_rows):
+        origins = prepare_points(latitudes_1[start:start + chunk_rows], \
+        longitudes_1[start:start + chunk_rows], exact)
+        yield start, [paired_distances(itertools.repeat(origin), points, \
+        exact) for origin in origins]
+
+def distance_matrix(latitudes_1: list, longitudes_1: list, \
+latitudes_2: list = None, longitudes_2: list = None, exact: bool = False):
+    '''
+    Compute the distances between every pair of points from two sets
+    (or within one set if the second one is not given).
+
+    Parameters:
+        latitudes_1 (list): Latitudes of the row points in degrees.
+        longitudes_1 (list): Longitudes of the row points in degrees.
+        latitudes_2 (list): Latitudes of the column points in degrees.
+        longitudes_2 (list): Longitudes of the column points in degrees.
+        exact (bool): Full precision instead of distance_two_points
+        rounding.
+
+    Returns:
+        list: One array.array of distances (in kilometers) per row point.
+
+    Examples:
+        >>> [list(row) for row in distance_matrix([10, -10], [20, -20])]
+        [[0.0, 4943.8], [4943.8, 0.0]]
+    '''
+
+    if latitudes_2 is None:
+        latitudes_2, longitudes_2 = latitudes_1, longitudes_1
+    matrix = []
+    for start, rows in distance_matrix_chunks(latitudes_1, longitudes_1, \
+    latitudes_2, longitudes_2, exact):
+        matrix.extend(rows)
+    return matrix
+
+def apply_wave_impact(position: float, min_float: float, max_float: float, \
+rng=random, truncated: bool = False):
     '''
     Apply a random wave impact to a coordinate, 
     keeping it within (min_float, max_float).
@@ -153,6 +426,11 @@ def apply_wave_impact(position: float, min_float: float, max_float: float):
         position (float): Original position (latitude or longitude).
         min_float (float): Minimum allowed value (exclusive).
         max_float (float): Maximum allowed value (exclusive).
+        rng (random.Random): Generator to draw from; the random module
+        (its shared generator) by default.
+        truncated (bool): If True, draw from the allowed part of the
+        wave range at once (see truncated_wave_impact) instead of
+        drawing again until the position is allowed.
 
     Returns:
         float: New position after wave impact, rounded to 2 decimals.
@@ -166,7 +444,11 @@ def apply_wave_impact(position: float, min_float: float, max_float: float):
         -9.5
     '''
 
-    num = random.random() * 2 - 1
+    if truncated:
+        return round(truncated_wave_impact(position, min_float, max_float, \
+        rng), 2)
+
+    num = rng.random() * 2 - 1
     new_position = position + num
     
     if min_float < new_position < max_float:
@@ -174,17 +456,165 @@ def apply_wave_impact(position: float, min_float: float, max_float: float):
 
     else:
         while not min_float < new_position < max_float:
-            num = random.random() * 2 - 1
+            num = rng.random() * 2 - 1
             new_position = position + num
         return round(new_position, 2)
 
-def wave_hit_vessel(latitude: float,longitude: float):
+def wave_range(position: float, min_float: float, max_float: float):
+    '''
+    Give the part of the wave range [position - 1, position + 1) that
+    lies inside (min_float, max_float).
+
+    Returns:
+        tuple: (low, high) bounds of the allowed positions.
+
+    Examples:
+        >>> wave_range(0, -90, 90)
+        (-1, 1)
+        >>> wave_range(89.5, -90, 90)
+        (88.5, 90)
+        >>> wave_range(95, -90, 90)
+        Traceback (most recent call last):
+        ValueError: No wave can bring 95 inside (-90, 90)
+    '''
+
+    low = max(position - 1, min_float)
+    high = min(position + 1, max_float)
+    if low >= high:
+        raise ValueError("No wave can bring " + str(position) + \
+        " inside (" + str(min_float) + ", " + str(max_float) + ")")
+    return low, high
+
+def truncated_wave_impact(position: float, min_float: float, \
+max_float: float, rng=random):
+    '''
+    Apply a wave impact by drawing straight from the allowed positions.
+
+    The loop of apply_wave_impact keeps a uniform draw from
+    [position - 1, position + 1) only if it is inside
+    (min_float, max_float), which leaves a uniform draw over the
+    overlap of the two intervals. Drawing from that overlap directly
+    gives the same distribution with one draw, however close the
+    position is to a limit. The result is not rounded.
+
+    Parameters:
+        position (float): Original position (latitude or longitude).
+        min_float (float): Minimum allowed value (exclusive).
+        max_float (float): Maximum allowed value (exclusive).
+        rng (random.Random): Generator to draw from.
+
+    Returns:
+        float: New position after wave impact.
+
+    Examples:
+        >>> 88.9 <= truncated_wave_impact(89.9, -90, 90) < 90
+        True
+        >>> -180 < truncated_wave_impact(-179.99, -180, 180) < -178.99
+        True
+    '''
+
+    low, high = wave_range(position, min_float, max_float)
+    new_position = low + rng.random() * (high - low)
+    # low itself is excluded when it is min_float; landing on it
+    # exactly has a chance of about 2 ** -53
+    while new_position == min_float:
+        new_position = low + rng.random() * (high - low)
+    return new_position
+
+def apply_wave_impacts(positions: list, min_float: float, max_float: float, \
+rng=random):
+    '''
+    Apply truncated wave impacts to many positions at once.
+
+    Parameters:
+        positions (list): Original positions.
+        min_float (float): Minimum allowed value (exclusive).
+        max_float (float): Maximum allowed value (exclusive).
+        rng (random.Random): Generator to draw from.
+
+    Returns:
+        array.array: New positions, rounded to 2 decimals.
+
+    Examples:
+        >>> impacts = apply_wave_impacts([179.99, -179.5, 0], -180, 180)
+        >>> [MIN_LONG < value < MAX_LONG for value in impacts]
+        [True, True, True]
+    '''
+
+    if any(not min_float - 1 < position < max_float + 1 \
+    for position in positions):
+        for position in positions:
+            wave_range(position, min_float, max_float)
+
+    draws = random_floats(rng, len(positions))
+    new_positions = [low + draw * (min(position + 1, max_float) - low) \
+    for position, draw, low in zip(positions, draws, \
+    [max(position - 1, min_float) for position in positions])]
+    if min_float in new_positions:
+        for i, new_position in enumerate(new_positions):
+            if new_position == min_float:
+                new_positions[i] = truncated_wave_impact(positions[i], \
+                min_float, max_float, rng)
+    return array.array('d', [round(value, 2) for value in new_positions])
+
+def wave_samplers_match(position: float, min_float: float, \
+max_float: float, nb_samples: int = 20000, rng=random):
+    '''
+    Check that truncated_wave_impact and the loop of apply_wave_impact
+    give the same distribution, with a two-sample Kolmogorov-Smirnov
+    test at the 1% level on unrounded draws.
+
+    Parameters:
+        position (float): Position to test from.
+        min_float (float): Minimum allowed value (exclusive).
+        max_float (float): Maximum allowed value (exclusive).
+        nb_samples (int): Draws from each sampler.
+        rng (random.Random): Generator to draw from.
+
+    Returns:
+        bool: True if the test finds no difference.
+
+    Examples:
+        >>> rng = random.Random(22)
+        >>> wave_samplers_match(89.7, -90, 90, rng=rng)
+        True
+        >>> wave_samplers_match(-179.95, -180, 180, rng=rng)
+        True
+        >>> wave_samplers_match(0, -90, 90, rng=rng)
+        True
+    '''
+
+    rejected = []
+    while len(rejected) < nb_samples:
+        new_position = position + (rng.random() * 2 - 1)
+        if min_float < new_position < max_float:
+            rejected.append(new_position)
+    truncated = [truncated_wave_impact(position, min_float, max_float, rng) \
+    for i in range(nb_samples)]
+
+    # Largest gap between the two empirical distribution functions
+    rejected.sort()
+    truncated.sort()
+    gap = 0
+    i = j = 0
+    while i < nb_samples and j < nb_samples:
+        if rejected[i] <= truncated[j]:
+            i += 1
+        else:
+            j += 1
+        gap = max(gap, abs(i - j) / nb_samples)
+    return gap < 1.63 * math.sqrt(2 / nb_samples)
+
+def wave_hit_vessel(latitude: float,longitude: float, rng=random, \
+truncated: bool = False):
     '''
     Simulate a wave hitting the vessel, affecting both latitude and longitude.
 
     Parameters:
         latitude (float): Current latitude of the vessel.
         longitude (float): Current longitude of the vessel.
+        rng (random.Random): Generator to draw from.
+        truncated (bool): Use truncated_wave_impact for the draws.
 
     Returns:
         tuple: New (latitude, longitude) after wave impact.
@@ -198,12 +628,14 @@ def wave_hit_vessel(latitude: float,longitude: float):
         (-19.55, 100.77)
     '''
 
-    latitude_new = apply_wave_impact(latitude, MIN_LAT, MAX_LAT)
-    longitude_new = apply_wave_impact(longitude, MIN_LONG, MAX_LONG)
+    latitude_new = apply_wave_impact(latitude, MIN_LAT, MAX_LAT, rng, \
+    truncated)
+    longitude_new = apply_wave_impact(longitude, MIN_LONG, MAX_LONG, rng, \
+    truncated)
     return (latitude_new, longitude_new)
 
 def move_toward_waypoint(current_latitude: float, current_longitude: float,\
-waypoint_latitude: float, waypoint_longitude: float):
+waypoint_latitude: float, waypoint_longitude: float, rng=random):
     '''
     Move the vessel a single step toward a waypoint.
 
@@ -212,6 +644,7 @@ waypoint_latitude: float, waypoint_longitude: float):
         current_longitude (float): Current longitude of the vessel.
         waypoint_latitude (float): Target latitude of the waypoint.
         waypoint_longitude (float): Target longitude of the waypoint.
+        rng (random.Random): Generator to draw from.
 
     Returns:
         tuple: Updated (latitude, longitude) after moving,
@@ -226,7 +659,7 @@ waypoint_latitude: float, waypoint_longitude: float):
         (-5.2, 25.3)
     '''
 
-    scale = random.random() + 1
+    scale = rng.random() + 1
     new_latitude = current_latitude + \
     (waypoint_latitude - current_latitude) / scale
 
@@ -247,7 +680,7 @@ waypoint_latitude: float, waypoint_longitude: float):
 
     return round(new_latitude, 2), round(new_longitude, 2)
 
-def vessel_menu():
+def vessel_menu(rng=random):
     '''
     Run the interactive vessel console for navigation.
 
@@ -263,7 +696,9 @@ def vessel_menu():
         - Failure if storm countdown reaches 0
 
     Parameters:
-        None
+        rng (random.Random): Generator for the moves and waves; the
+        random module by default, or a RandomStreams stream to replay
+        a voyage.
 
     Returns:
         None
@@ -298,12 +733,12 @@ def vessel_menu():
             else:
                 current_latitude, current_longitude = \
                 move_toward_waypoint(current_latitude, \
-                current_longitude, waypoint_latitude, waypoint_longitude)
+                current_longitude, waypoint_latitude, waypoint_longitude, rng)
                 print("Captain Log: Journeyed towards waypoint.")
 
-                if random.random() < 0.20:
+                if rng.random() < WAVE_CHANCE:
                     current_latitude, current_longitude = \
-                    wave_hit_vessel(current_latitude, current_longitude)
+                    wave_hit_vessel(current_latitude, current_longitude, rng)
                     print("Captain Log: Wave impact recorded.")
                         
                 print("Current position is latitude of", \
@@ -316,9 +751,817 @@ def vessel_menu():
                 storm_countdown -= 1
                 print("Storm T-minus:", storm_countdown)
                 
-                if distance <= 10.0:
+                if distance <= WAYPOINT_RADIUS:
                     return print\
                     ("Mission success: waypoint reached before storm.")
                     
         elif choice == 3:
-            return print("Console closed by captain.")
\ No newline at end of file
+            return print("Console closed by captain.")
+
+class Fleet:
+    '''
+    Many vessels heading to their waypoints before the storm, stored
+    column by column (one array per field) and advanced together.
+
+    Each step repeats choice 2 of vessel_menu for every vessel still
+    sailing: move toward the waypoint, a wave hit with WAVE_CHANCE,
+    the distance check and the storm countdown. A vessel within
+    WAYPOINT_RADIUS km has reached its waypoint, and one whose
+    countdown runs out first is caught by the storm.
+
+    Parameters:
+        latitudes (list): Starting latitudes.
+        longitudes (list): Starting longitudes.
+        waypoint_latitudes (list): Waypoint latitude of each vessel.
+        waypoint_longitudes (list): Waypoint longitude of each vessel.
+        storm_steps (int): Steps before the storm hits.
+        rng (random.Random): Generator for the moves and waves.
+
+    Examples:
+        >>> random.seed(3)
+        >>> fleet = Fleet([0, 0], [0, 10], [0.5, 0], [0.5, 170])
+        >>> fleet.run()
+        1
+        >>> list(fleet.status), list(fleet.countdowns)
+        ([1, 2], [4, 0])
+    '''
+
+    def __init__(self, latitudes: list, longitudes: list, \
+    waypoint_latitudes: list, waypoint_longitudes: list, \
+    storm_steps: int = STORM_STEPS, rng=random):
+        self.rng = rng
+        self.latitudes = array.array('d', latitudes)
+        self.longitudes = array.array('d', longitudes)
+        self.waypoint_latitudes = array.array('d', waypoint_latitudes)
+        self.waypoint_longitudes = array.array('d', waypoint_longitudes)
+        size = len(self.latitudes)
+        if not size == len(self.longitudes) == \
+        len(self.waypoint_latitudes) == len(self.waypoint_longitudes):
+            raise ValueError("Every vessel needs a position and a waypoint")
+
+        self.waypoints = prepare_points(self.waypoint_latitudes, \
+        self.waypoint_longitudes, False)
+        self.countdowns = array.array('i', [storm_steps]) * size
+        self.distances = paired_distances(prepare_points(self.latitudes, \
+        self.longitudes, False), self.waypoints, False)
+        self.status = bytearray(size)
+        # Indices of the vessels still sailing
+        self.sailing = list(range(size))
+
+    def __len__(self):
+        return len(self.status)
+
+    def step(self):
+        '''
+        Advance every sailing vessel by one move.
+
+        Returns:
+            int: Number of vessels still sailing.
+        '''
+
+        sailing = self.sailing
+        if not sailing:
+            return 0
+        latitudes = self.latitudes
+        longitudes = self.longitudes
+        draw = self.rng.random
+
+        # Move toward the waypoints, as in move_toward_waypoint
+        scales = [scale + 1 for scale in random_floats(self.rng, \
+        len(sailing))]
+        for column, targets, low, high in \
+        ((latitudes, self.waypoint_latitudes, MIN_LAT, MAX_LAT), \
+        (longitudes, self.waypoint_longitudes, MIN_LONG, MAX_LONG)):
+            moved = [round(min(max(column[i] + (targets[i] - column[i]) \
+            / scale, low), high), 2) for i, scale in zip(sailing, scales)]
+            for i, value in zip(sailing, moved):
+                column[i] = value
+
+        # Waves, as in wave_hit_vessel
+        hit = [i for i in sailing if draw() < WAVE_CHANCE]
+        for i in hit:
+            latitudes[i], longitudes[i] = \
+            wave_hit_vessel(latitudes[i], longitudes[i], self.rng)
+
+        # Distances and storm countdown
+        waypoints = self.waypoints
+        distances = paired_distances(prepare_points( \
+        [latitudes[i] for i in sailing], \
+        [longitudes[i] for i in sailing], False), \
+        [waypoints[i] for i in sailing], False)
+        still_sailing = []
+        for i, distance in zip(sailing, distances):
+            self.distances[i] = distance
+            self.countdowns[i] -= 1
+            if distance <= WAYPOINT_RADIUS:
+                self.status[i] = REACHED
+            elif self.countdowns[i] <= 0:
+                self.status[i] = CAUGHT_BY_STORM
+            else:
+                still_sailing.append(i)
+        self.sailing = still_sailing
+        return len(still_sailing)
+
+    def run(self):
+        '''
+        Step until no vessel is sailing.
+
+        Returns:
+            int: Number of vessels that reached their waypoint.
+        '''
+
+        while self.step():
+            pass
+        return self.status.count(REACHED)
+
+def count_successes(start_latitude: float, start_longitude: float, \
+waypoint_latitude: float, waypoint_longitude: float, steps: int, \
+nb_voyages: int, seed: int, batch: int):
+    '''
+    Sail nb_voyages vessels from the same start to the same waypoint and
+    count those that arrive before the storm. The draws come from
+    stream batch of RandomStreams(seed), so a batch gives the same
+    count in any process.
+
+    Returns:
+        int: Number of successful voyages.
+
+    Examples:
+        >>> count_successes(0, 0, 0.05, 0.05, 5, 100, 1, 0)
+        99
+        >>> count_successes(0, 0, 0, 170, 1, 100, 1, 0)
+        0
+    '''
+
+    fleet = Fleet([start_latitude] * nb_voyages, \
+    [start_longitude] * nb_voyages, [waypoint_latitude] * nb_voyages, \
+    [waypoint_longitude] * nb_voyages, steps, \
+    RandomStreams(seed).stream("voyages", batch))
+    return fleet.run()
+
+def wilson_interval(successes: int, trials: int, z: float = CONFIDENCE_Z):
+    '''
+    Compute the Wilson score interval of a success probability.
+
+    Returns:
+        tuple: (low, high) bounds of the interval.
+
+    Examples:
+        >>> wilson_interval(50, 100)
+        (0.40382982859014716, 0.5961701714098528)
+        >>> wilson_interval(0, 0)
+        (0.0, 1.0)
+    '''
+
+    if trials == 0:
+        return 0.0, 1.0
+    rate = successes / trials
+    centre = rate + z * z / (2 * trials)
+    margin = z * math.sqrt(rate * (1 - rate) / trials + \
+    z * z / (4 * trials * trials))
+    scale = 1 + z * z / trials
+    return (centre - margin) / scale, (centre + margin) / scale
+
+def estimate_success(start_latitude: float, start_longitude: float, \
+waypoint_latitude: float, waypoint_longitude: float, \
+steps: int = STORM_STEPS, tolerance: float = 0.005, seed: int = 0, \
+max_voyages: int = MAX_VOYAGES, batch_size: int = SUCCESS_BATCH, \
+workers=None):
+    '''
+    Estimate the chance that a vessel reaches the waypoint before the
+    storm, replaying choice 2 of vessel_menu without any input.
+
+    Batches of voyages run in a process pool (in this process if
+    workers is 1). Batches are counted in order, and the estimate stops
+    as soon as half the width of the confidence interval is at most
+    tolerance, so the result depends on the seed but not on workers.
+
+    Parameters:
+        start_latitude (float): Latitude of the vessel.
+        start_longitude (float): Longitude of the vessel.
+        waypoint_latitude (float): Latitude of the waypoint.
+        waypoint_longitude (float): Longitude of the waypoint.
+        steps (int): Moves before the storm hits.
+        tolerance (float): Wanted half width of the interval.
+        seed (int): Seed of the random streams.
+        max_voyages (int): Voyages after which the estimate stops anyway.
+        batch_size (int): Voyages per batch.
+        workers (int): Processes to use, None for one per CPU.
+
+    Returns:
+        dict: probability, low and high (the confidence interval),
+        voyages and successes.
+
+    Raises:
+        ValueError: If max_voyages or batch_size is less than 1.
+
+    Examples:
+        >>> result = estimate_success(0, 0, 1, 1, tolerance=0.05, \
+        batch_size=200, workers=1)
+        >>> result['voyages'], result['low'] < result['probability'] < \
+        result['high']
+        (200, True)
+    '''
+
+    if max_voyages < 1 or batch_size < 1:
+        raise ValueError("max_voyages and batch_size must be at least 1")
+
+    voyage = (start_latitude, start_longitude, waypoint_latitude, \
+    waypoint_longitude, steps)
+    nb_batches = max(1, math.ceil(max_voyages / batch_size))
+    sizes = [min(batch_size, max_voyages - batch * batch_size) \
+    for batch in range(nb_batches)]
+    if workers == 1:
+        pool = None
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(workers)
+        ahead = 2 * (workers or os.cpu_count())
+
+    successes = voyages = 0
+    pending = collections.deque()
+    try:
+        for batch, size in enumerate(sizes):
+            if pool is None:
+                count = count_successes(*voyage, size, seed, batch)
+            else:
+                # Keep the pool busy with the batches that come next
+                next_batch = batch + len(pending)
+                while len(pending) < ahead and next_batch < nb_batches:
+                    pending.append(pool.submit(count_successes, *voyage, \
+                    sizes[next_batch], seed, next_batch))
+                    next_batch += 1
+                count = pending.popleft().result()
+            successes += count
+            voyages += size
+            low, high = wilson_interval(successes, voyages)
+            if (high - low) / 2 <= tolerance:
+                break
+    finally:
+        if pool is not None:
+            for future in pending:
+                future.cancel()
+            pool.shutdown()
+
+    return {'probability': successes / voyages, 'low': low, 'high': high, \
+    'voyages': voyages, 'successes': successes}
+
+#Estimates of sweep_success, by (bucket start km, bucket end km, steps,
+#tolerance, seed, max_voyages, batch_size)
+SUCCESS_CACHE = {}
+
+def sweep_success(starts: list, waypoints: list, \
+steps: int = STORM_STEPS, bucket_km: float = DISTANCE_BUCKET_KM, \
+tolerance: float = 0.005, seed: int = 0, max_voyages: int = MAX_VOYAGES, \
+batch_size: int = SUCCESS_BATCH, workers=None):
+    '''
+    Estimate the success chance for every start and waypoint pair of two
+    grids.
+
+    Pairs are grouped by their distance, in buckets bucket_km wide, and
+    one estimate_success run (for the first pair of a bucket) is shared
+    by the whole bucket and kept in SUCCESS_CACHE for later sweeps. The
+    cache is keyed by the bounds of the bucket and every setting that
+    changes the estimate, so sweeps with other settings do not mix.
+    The chance also depends a little on where the voyage is (moves are
+    made in degrees), so buckets should stay narrow.
+
+    Parameters:
+        starts (list): (latitude, longitude) starting points.
+        waypoints (list): (latitude, longitude) waypoints.
+        steps (int): Moves before the storm hits.
+        bucket_km (float): Width of a distance bucket in km.
+        tolerance, seed, max_voyages, batch_size, workers: Passed on to
+        estimate_success.
+
+    Returns:
+        list: One row per start, holding the estimated probability for
+        each waypoint.
+
+    Examples:
+        >>> sweep_success([(0, 0)], [(0, 0.05), (0.05, 0)], \
+        tolerance = 0.05, batch_size = 100, workers = 1)
+        [[0.99, 0.99]]
+        >>> len(SUCCESS_CACHE)
+        1
+        >>> sweep_success([(0, 0)], [(0, 0.05)], bucket_km=2000, \
+        tolerance=0.05, batch_size=100, workers=1)
+        [[0.99]]
+        >>> len(SUCCESS_CACHE)
+        2
+    '''
+
+    rows = []
+    for start in starts:
+        row = []
+        for waypoint in waypoints:
+            distance = distance_two_points(*start, *waypoint)
+            bucket = distance // bucket_km
+            key = (bucket * bucket_km, (bucket + 1) * bucket_km, steps, \
+            tolerance, seed, max_voyages, batch_size)
+            if key not in SUCCESS_CACHE:
+                SUCCESS_CACHE[key] = estimate_success(*start, *waypoint, \
+                steps, tolerance, seed, max_voyages, batch_size, workers)
+            row.append(SUCCESS_CACHE[key]['probability'])
+        rows.append(row)
+    return rows
+
+
+class SpatialIndex:
+    '''
+    Points on the Earth sorted into buckets for fast radius and nearest
+    point queries.
+
+    Each point is turned into a unit vector and stored in the bucket of
+    the cube (of side cell_km, measured along the Earth's surface) that
+    holds it, so a query only looks at the cubes near the searched
+    area. The unit vectors are built from the angles rounded like
+    degrees_to_radians, and every distance is computed by
+    distance_two_points, so results match a scan with
+    distance_two_points exactly.
+
+    Parameters:
+        cell_km (float): Side of a bucket cube in km.
+
+    Examples:
+        >>> index = SpatialIndex.from_coordinates([0, 0, 1, 40], \
+        [0, 0.05, 1, 40])
+        >>> index.within(0, 0, 10)
+        [(0.0, 0), (0.0, 1)]
+        >>> index.nearest(2, 2, 2)
+        [(90.18, 2), (270.58, 0)]
+        >>> index.move(3, 0.01, 0.01)
+        >>> index.remove(0)
+        >>> index.within(0, 0, 10)
+        [(0.0, 1), (0.0, 3)]
+    '''
+
+    def __init__(self, cell_km: float = SPATIAL_CELL_KM):
+        if cell_km <= 0:
+            raise ValueError("cell_km must be positive")
+        # Side of a cube, in the units of the unit vectors
+        self.side = cell_km / EARTH_RADIUS
+        self.points = {}
+        self.buckets = {}
+
+    @classmethod
+    def from_coordinates(cls, latitudes: list, longitudes: list, \
+    cell_km: float = SPATIAL_CELL_KM):
+        '''
+        Build an index holding point i of the coordinate lists under the
+        key i.
+        '''
+
+        index = cls(cell_km)
+        for key, (latitude, longitude) in \
+        enumerate(zip(latitudes, longitudes)):
+            index.insert(key, latitude, longitude)
+        return index
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, key):
+        return key in self.points
+
+    def unit_vector(self, latitude: float, longitude: float):
+        '''
+        Return the unit vector of a point, from its rounded angles.
+        '''
+
+        latitude, longitude, cos_lat = \
+        prepare_points([latitude], [longitude], False)[0]
+        return (cos_lat * math.cos(longitude), \
+        cos_lat * math.sin(longitude), math.sin(latitude))
+
+    def cell(self, vector: tuple):
+        '''
+        Return the cube holding a unit vector.
+        '''
+
+        side = self.side
+        return tuple(math.floor(value / side) for value in vector)
+
+    def insert(self, key, latitude: float, longitude: float):
+        '''
+        Add a point, or move it if the key is already in the index.
+        '''
+
+        if key in self.points:
+            self.remove(key)
+        vector = self.unit_vector(latitude, longitude)
+        cell = self.cell(vector)
+        self.points[key] = (latitude, longitude, vector, cell)
+        self.buckets.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        '''
+        Take a point out of the index. Raises KeyError if it is missing.
+        '''
+
+        cell = self.points.pop(key)[3]
+        bucket = self.buckets[cell]
+        bucket.discard(key)
+        if not bucket:
+            del self.buckets[cell]
+
+    def move(self, key, latitude: float, longitude: float):
+        '''
+        Give a point new coordinates.
+        '''
+
+        self.insert(key, latitude, longitude)
+
+    def candidates(self, vector: tuple, radius_km: float):
+        '''
+        Yield the keys of every point in the cubes that touch the ball
+        around vector whose radius is the chord of radius_km.
+        '''
+
+        angle = min(radius_km / EARTH_RADIUS, math.pi)
+        chord = 2 * math.sin(angle / 2)
+        side = self.side
+        (x_low, y_low, z_low), (x_high, y_high, z_high) = \
+        [[math.floor(max(value - chord, -1.0) / side) for value in vector], \
+        [math.floor(min(value + chord, 1.0) / side) for value in vector]]
+        nb_cells = (x_high - x_low + 1) * (y_high - y_low + 1) * \
+        (z_high - z_low + 1)
+
+        if nb_cells > len(self.buckets):
+            cells = [(x, y, z) for x, y, z in self.buckets \
+            if x_low <= x <= x_high and y_low <= y <= y_high \
+            and z_low <= z <= z_high]
+        else:
+            cells = [cell for cell in itertools.product( \
+            range(x_low, x_high + 1), range(y_low, y_high + 1), \
+            range(z_low, z_high + 1)) if cell in self.buckets]
+        for cell in cells:
+            yield from self.buckets[cell]
+
+    def within(self, latitude: float, longitude: float, radius_km: float):
+        '''
+        Find every point at most radius_km from a position.
+
+        Parameters:
+            latitude (float): Latitude of the position.
+            longitude (float): Longitude of the position.
+            radius_km (float): Search radius in km.
+
+        Returns:
+            list: (distance, key) pairs, closest first, with distances
+            from distance_two_points.
+        '''
+
+        found = []
+        vector = self.unit_vector(latitude, longitude)
+        for key in self.candidates(vector, radius_km + SPATIAL_SLACK_KM):
+            point_latitude, point_longitude = self.points[key][:2]
+            distance = distance_two_points(latitude, longitude, \
+            point_latitude, point_longitude)
+            if distance <= radius_km:
+                found.append((distance, key))
+        found.sort()
+        return found
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1):
+        '''
+        Find the k points closest to a position (fewer if the index
+        holds fewer). Ties are broken by key.
+
+        Returns:
+            list: (distance, key) pairs, closest first.
+        '''
+
+        k = min(k, len(self.points))
+        if k <= 0:
+            return []
+        radius_km = self.side * EARTH_RADIUS
+        # Every point lies within half the Earth's circumference
+        farthest = math.pi * EARTH_RADIUS
+        while True:
+            found = self.within(latitude, longitude, radius_km)
+            # All points closer than radius_km are in found, so its k
+            # closest are the k closest overall
+            if len(found) >= k or radius_km >= farthest:
+                return found[:k]
+            radius_km = min(2 * radius_km, farthest)
+
+
+class RouteDistances:
+    '''
+    Distances between the waypoints of a set, from distance_two_points.
+
+    The matrix is filled as pairs are asked for, since the planner only
+    needs the distances between nearby waypoints. The nearest waypoints
+    of each one come from a SpatialIndex.
+
+    Parameters:
+        waypoints (list): (latitude, longitude) of each waypoint.
+
+    Examples:
+        >>> distances = RouteDistances([(0, 0), (0, 1), (0, 5)])
+        >>> distances.distance(0, 2), distances.neighbours(0, 1)
+        (574.02, [1])
+    '''
+
+    def __init__(self, waypoints: list):
+        self.waypoints = list(waypoints)
+        self.known = {}
+        self.index = SpatialIndex.from_coordinates( \
+        [waypoint[0] for waypoint in self.waypoints], \
+        [waypoint[1] for waypoint in self.waypoints])
+        self.nearby = {}
+
+    def __len__(self):
+        return len(self.waypoints)
+
+    def distance(self, i: int, j: int):
+        '''
+        Return the distance between waypoints i and j in km.
+        '''
+
+        if i == j:
+            return 0.0
+        key = (i, j) if i < j else (j, i)
+        if key not in self.known:
+            self.known[key] = distance_two_points(*self.waypoints[i], \
+            *self.waypoints[j])
+        return self.known[key]
+
+    def neighbours(self, i: int, k: int = ROUTE_NEIGHBOURS):
+        '''
+        Return the k waypoints closest to waypoint i, closest first.
+        '''
+
+        if (i, k) not in self.nearby:
+            found = self.index.nearest(*self.waypoints[i], k + 1)
+            self.nearby[(i, k)] = [key for distance, key in found \
+            if key != i][:k]
+        return self.nearby[(i, k)]
+
+#RouteDistances of recent waypoint sets, by frozenset of waypoints
+ROUTE_CACHE = {}
+
+def route_distances(waypoints: list):
+    '''
+    Return the RouteDistances of a set of waypoints, from ROUTE_CACHE
+    when the same set (in any order) was planned recently. Its
+    waypoints are the distinct ones, sorted.
+    '''
+
+    key = frozenset(waypoints)
+    if key not in ROUTE_CACHE:
+        if len(ROUTE_CACHE) >= ROUTE_CACHE_SIZE:
+            del ROUTE_CACHE[next(iter(ROUTE_CACHE))]
+        ROUTE_CACHE[key] = RouteDistances(sorted(key))
+    return ROUTE_CACHE[key]
+
+def route_length(route: list, start=None):
+    '''
+    Compute the length of a route through waypoints in order.
+
+    Parameters:
+        route (list): (latitude, longitude) waypoints in visiting order.
+        start (tuple): Position the route starts from, or None.
+
+    Returns:
+        float: Length in km, as a sum of distance_two_points results.
+
+    Examples:
+        >>> route_length([(0, 1), (0, 5)], (0, 0))
+        574.02
+    '''
+
+    if start is not None:
+        route = [start] + list(route)
+    return round(sum(distance_two_points(*route[i], *route[i + 1]) \
+    for i in range(len(route) - 1)), 2)
+
+def nearest_neighbour_route(distances: RouteDistances, first: int, \
+distance, start=None):
+    '''
+    Build a route by always going to the closest waypoint not visited
+    yet.
+
+    Parameters:
+        distances (RouteDistances): Waypoints of the route.
+        first (int): Node the route starts from.
+        distance (function): Gives the distance between two nodes.
+        start (tuple): Position of node -1 (the start), if used.
+
+    Returns:
+        list: Nodes in visiting order, beginning with first.
+    '''
+
+    unvisited = SpatialIndex.from_coordinates( \
+    [waypoint[0] for waypoint in distances.waypoints], \
+    [waypoint[1] for waypoint in distances.waypoints])
+    route = [first]
+    if first != -1:
+        unvisited.remove(first)
+    while len(unvisited):
+        last = route[-1]
+        position = start if last == -1 else distances.waypoints[last]
+        route.append(unvisited.nearest(*position)[0][1])
+        unvisited.remove(route[-1])
+    return route
+
+def two_opt_pass(route: list, distance, neighbours):
+    '''
+    Look once along a route for two legs that are shorter when swapped
+    (reversing the waypoints between them), and swap them. The first
+    node stays first and the route does not return to it.
+
+    Returns:
+        bool: True if the route was shortened.
+    '''
+
+    position = {node: i for i, node in enumerate(route)}
+    last = len(route) - 1
+    improved = False
+    for i in range(last):
+        a = route[i]
+        b = route[i + 1]
+        for c in neighbours(a):
+            j = position[c]
+            if j <= i + 1:
+                continue
+            gain = distance(a, b) - distance(a, c)
+            if j < last:
+                d = route[j + 1]
+                gain += distance(c, d) - distance(b, d)
+            if gain > 1e-9:
+                route[i + 1:j + 1] = route[j:i:-1]
+                for k in range(i + 1, j + 1):
+                    position[route[k]] = k
+                improved = True
+                break
+    return improved
+
+def or_opt_pass(route: list, distance, neighbours):
+    '''
+    Look once for runs of 1 to 3 waypoints that make the route shorter
+    when moved (possibly reversed) next to one of their neighbours, and
+    move them. The first node stays first.
+
+    Returns:
+        bool: True if the route was shortened.
+    '''
+
+    improved = False
+    position = {node: k for k, node in enumerate(route)}
+    for length in (1, 2, 3):
+        i = 1
+        while i + length <= len(route):
+            segment = route[i:i + length]
+            before = route[i - 1]
+            after = route[i + length] if i + length < len(route) else None
+            saved = distance(before, segment[0])
+            if after is not None:
+                saved += distance(segment[-1], after) - \
+                distance(before, after)
+
+            best = None
+            for c in neighbours(segment[0]) + neighbours(segment[-1]):
+                k = position[c]
+                if i - 1 <= k < i + length:
+                    continue
+                # Leg c -> c_next is left as it is by removing the segment
+                c_next = route[k + 1] if k + 1 < len(route) else None
+                for ends in (segment, segment[::-1]):
+                    added = distance(c, ends[0])
+                    if c_next is not None:
+                        added += distance(ends[-1], c_next) - \
+                        distance(c, c_next)
+                    gain = saved - added
+                    if gain > 1e-9 and (best is None or gain > best[0]):
+                        best = (gain, k, ends)
+
+            if best is None:
+                i += 1
+            else:
+                gain, k, ends = best
+                rest = route[:i] + route[i + length:]
+                if k > i:
+                    k -= length
+                route[:] = rest[:k + 1] + ends + rest[k + 1:]
+                position = {node: index for index, node in enumerate(route)}
+                improved = True
+    return improved
+
+def plan_route(waypoints: list, start=None, improve: bool = True):
+    '''
+    Choose the order in which to visit waypoints so that the route is
+    short.
+
+    The route is built by going to the nearest waypoint each time, then
+    shortened with 2-opt moves (swapping two legs) and Or-opt moves
+    (moving runs of up to 3 waypoints) among nearby waypoints, until no
+    move helps or ROUTE_PASSES rounds are done. Distances come from
+    distance_two_points and are kept per waypoint set in ROUTE_CACHE.
+
+    Parameters:
+        waypoints (list): (latitude, longitude) of each waypoint.
+        start (tuple): Position of the vessel, or None to start from a
+        waypoint.
+        improve (bool): Shorten the nearest waypoint route.
+
+    Returns:
+        list: Indices into waypoints, in visiting order.
+
+    Examples:
+        >>> plan_route([(0, 3), (0, 1), (0, 2), (0, 1)], (0, 0))
+        [1, 3, 2, 0]
+        >>> plan_route([(5, 5), (0, 0), (5, 0), (0, 5)])
+        [0, 2, 1, 3]
+    '''
+
+    if not waypoints:
+        return []
+    distances = route_distances(waypoints)
+    nodes = {}
+    for i, waypoint in enumerate(waypoints):
+        nodes.setdefault(waypoint, []).append(i)
+    node_of = {waypoint: node \
+    for node, waypoint in enumerate(distances.waypoints)}
+
+    # Node -1 stands for the start position
+    from_start = {}
+    def distance(i, j):
+        if i == -1 or j == -1:
+            other = j if i == -1 else i
+            if other == -1:
+                return 0.0
+            if other not in from_start:
+                from_start[other] = distance_two_points(*start, \
+                *distances.waypoints[other])
+            return from_start[other]
+        return distances.distance(i, j)
+
+    start_neighbours = []
+    def neighbours(i):
+        if i == -1:
+            return start_neighbours
+        return distances.neighbours(i)
+
+    if start is None:
+        first = node_of[waypoints[0]]
+    else:
+        first = -1
+        start_neighbours = [key for distance_km, key in \
+        distances.index.nearest(*start, ROUTE_NEIGHBOURS)]
+    route = nearest_neighbour_route(distances, first, distance, start)
+
+    if improve:
+        for i in range(ROUTE_PASSES):
+            swapped = two_opt_pass(route, distance, neighbours)
+            moved = or_opt_pass(route, distance, neighbours)
+            if not swapped and not moved:
+                break
+
+    order = []
+    for node in route:
+        if node != -1:
+            order.extend(nodes[distances.waypoints[node]])
+    return order
+
+def sail_route(latitude: float, longitude: float, route: list, \
+steps=STORM_STEPS, rng=random):
+    '''
+    Sail through a list of waypoints with the step logic of vessel_menu:
+    each move goes toward the current waypoint, may be followed by a
+    wave, and the next waypoint is taken once the vessel is within
+    WAYPOINT_RADIUS km.
+
+    Parameters:
+        latitude (float): Starting latitude.
+        longitude (float): Starting longitude.
+        route (list): (latitude, longitude) waypoints in visiting order,
+        for example from plan_route.
+        steps (int): Moves before the storm hits, or None for no storm.
+        rng (random.Random): Generator for the moves and waves.
+
+    Returns:
+        dict: reached (number of waypoints reached), moves, and the final
+        latitude and longitude.
+
+    Examples:
+        >>> result = sail_route(0, 0, [(0, 0.05), (0.05, 0.05)], None, \
+        random.Random(1))
+        >>> result['reached'], result['moves']
+        (2, 2)
+    '''
+
+    reached = 0
+    moves = 0
+    while reached < len(route) and (steps is None or moves < steps):
+        waypoint_latitude, waypoint_longitude = route[reached]
+        latitude, longitude = move_toward_waypoint(latitude, longitude, \
+        waypoint_latitude, waypoint_longitude, rng)
+        if rng.random() < WAVE_CHANCE:
+            latitude, longitude = wave_hit_vessel(latitude, longitude, rng)
+        moves += 1
+        if distance_two_points(latitude, longitude, waypoint_latitude, \
+        waypoint_longitude) <= WAYPOINT_RADIUS:
+            reached += 1
+    return {'reached': reached, 'moves': moves, 'latitude': latitude, \
+    'longitude': longitude}
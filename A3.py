@@ -5,7 +5,24 @@
 # automatically solve certain solvable boards using logical rules.
 
 # Write your program here:
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import itertools
+import json
+import math
+import mmap
+import operator
+import os
 import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import weakref
 
 # Constant variables
 HIDDEN_SYMBOL = '?'
@@ -13,6 +30,51 @@ FLAG_SYMBOL = '\u2691'
 EASY_PERCENT = 0.10
 MEDIUM_PERCENT = 0.30
 HARD_PERCENT = 0.50
+DIFFICULTY_PERCENTS = {"EASY": EASY_PERCENT, "MEDIUM": MEDIUM_PERCENT,
+                       "HARD": HARD_PERCENT}
+
+# Translation tables used by generate_helper_board_fast: a mine becomes
+# 16, and any sum of 16 or more (a mine) is then mapped to code 9
+MINE_MARKS = bytes([0, 16]) + bytes(254)
+MINE_COUNTS = bytes(range(16)) + bytes([9]) * 240
+
+# Results returned by the solvers
+SOLVED = 'solved'
+STUCK = 'stuck'
+
+# Largest group of linked hidden cells the constraint solver will try
+# every mine layout for
+MAX_ENUMERATION_CELLS = 24
+
+# Largest number of partial layout counts count_layouts keeps for one
+# cell when it counts a larger group for mine_probabilities
+MAX_LAYOUT_STATES = 20000
+
+# No-guess boards: candidates tried per request, verified boards kept
+# per board size before an unseeded request reuses them, and most
+# verified boards and board sizes kept in NO_GUESS_CACHE
+NO_GUESS_ATTEMPTS = 1000
+NO_GUESS_POOL_SIZE = 32
+NO_GUESS_CACHE_SIZE = 256
+NO_GUESS_CACHE_SIZES = 16
+
+# Number of constraint group shapes whose layout counts are kept
+LAYOUT_CACHE_SIZE = 4096
+
+# Number of board shapes whose neighbour table is kept in memory
+NEIGHBOUR_TABLE_CACHE_SIZE = 16
+
+# Chunked boards: default size (large enough to never be reached),
+# side of a chunk, number of game chunks kept in memory, and cells a
+# single cascade may reveal before the rest is left for later
+CHUNKED_BOARD_SIZE = 2 ** 32
+CHUNK_SIZE = 64
+MAX_LOADED_CHUNKS = 256
+CHUNKED_CASCADE_CELLS = 10000
+
+# Longest row or column count a neighbour table stores the kinds of;
+# longer boards (such as chunked boards) work them out on each lookup
+MAX_STORED_LINE = 1 << 20
 
 def init_board(nb_rows: int, nb_cols: int, value):
     '''
@@ -62,6 +124,9 @@ def count_total(board: list, value):
         >>> count_total([[0, 0, 0]], 1)
         0
     '''
+    if isinstance(board, Board):
+        return board.count(value)
+
     counter = 0
     for row in board:
         for num in row:
@@ -96,6 +161,114 @@ def is_valid_position(board: list, row: int, col: int):
     else: 
         return row < len(board) and col < len(board[0])
 
+class LineKinds:
+    '''
+    The kinds of the rows (or columns) of a very long board, worked out
+    on each lookup instead of being stored.
+
+    Examples:
+        >>> kinds = LineKinds(2 ** 40)
+        >>> kinds[0], kinds[5], kinds[2 ** 40 - 1]
+        (0, 1, 2)
+    '''
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, index: int):
+        if index == 0:
+            return 0
+        if index == self.size - 1:
+            return 2
+        return 1
+
+class NeighbourTable:
+    '''
+    The neighbours of every cell for one board shape.
+
+    A cell's neighbours only depend on whether its row and its column
+    are the first, a middle, the last or the only one. The table keeps
+    that kind for every row and column, and for each of the 16
+    combinations the neighbour steps as (row, col) offsets and as
+    offsets of a flat index, in row-major order.
+
+    Parameters:
+        nb_rows (int): Number of rows of the board.
+        nb_cols (int): Number of columns of the board.
+
+    Examples:
+        >>> table = NeighbourTable(3, 4)
+        >>> table.steps(0, 0)
+        ((0, 1), (1, 0), (1, 1))
+        >>> table.offsets(1, 1)
+        (-5, -4, -3, -1, 1, 3, 4, 5)
+    '''
+
+    def __init__(self, nb_rows: int, nb_cols: int):
+        self.nb_rows = nb_rows
+        self.nb_cols = nb_cols
+        self.row_kinds = NeighbourTable.line_kinds(nb_rows)
+        self.col_kinds = NeighbourTable.line_kinds(nb_cols)
+
+        # Steps allowed along one axis for each kind of row or column
+        moves = ((0, 1), (-1, 0, 1), (-1, 0), (0,))
+        self.kind_steps = []
+        self.kind_offsets = []
+        for row_kind in range(4):
+            for col_kind in range(4):
+                steps = tuple((dr, dc) for dr in moves[row_kind]
+                              for dc in moves[col_kind]
+                              if not (dr == 0 and dc == 0))
+                self.kind_steps.append(steps)
+                self.kind_offsets.append(
+                    tuple(dr * nb_cols + dc for dr, dc in steps))
+
+    @staticmethod
+    def line_kinds(size: int):
+        '''
+        Return the kind of every row (or column) of a given count:
+        0 for the first, 1 for a middle, 2 for the last, 3 if alone.
+        '''
+        if size == 1:
+            return bytearray([3])
+        if size > MAX_STORED_LINE:
+            return LineKinds(size)
+        return bytearray([0]) + bytearray([1]) * (size - 2) + \
+            bytearray([2])
+
+    def steps(self, row: int, col: int):
+        '''
+        Return the (row, col) offsets of the neighbours of a cell.
+        '''
+        return self.kind_steps[self.row_kinds[row] * 4 +
+                               self.col_kinds[col]]
+
+    def offsets(self, row: int, col: int):
+        '''
+        Return the flat index offsets of the neighbours of a cell.
+        '''
+        return self.kind_offsets[self.row_kinds[row] * 4 +
+                                 self.col_kinds[col]]
+
+@functools.lru_cache(maxsize=NEIGHBOUR_TABLE_CACHE_SIZE)
+def neighbour_table(nb_rows: int, nb_cols: int):
+    '''
+    Return the shared NeighbourTable of a board shape, building it on
+    first use. The least recently used shapes are evicted.
+
+    Parameters:
+        nb_rows (int): Number of rows of the board.
+        nb_cols (int): Number of columns of the board.
+
+    Returns:
+        NeighbourTable: The table for that shape.
+
+    Examples:
+        >>> neighbour_table(2, 2) is neighbour_table(2, 2)
+        True
+    '''
+    return NeighbourTable(nb_rows, nb_cols)
+
 def get_neighbour_positions(board: list, row: int, col: int):
     '''
     Get a list of valid neighbouring positions around a cell.
@@ -116,12 +289,8 @@ def get_neighbour_positions(board: list, row: int, col: int):
         >>> get_neighbour_positions([[1, 2, 3], [4, 5, 6]], 0, 0)
         [[0, 1], [1, 0], [1,1]]
     '''
-    neighbours = []
-    for i in range(row - 1, row + 2):
-        for j in range(col - 1, col +2):
-            if is_valid_position(board, i, j) and not(i == row and j == col):
-                neighbours.append([i, j]) 
-    return neighbours
+    table = neighbour_table(len(board), len(board[0]))
+    return [[row + dr, col + dc] for dr, dc in table.steps(row, col)]
 
 def count_neighbours(board: list, row: int, col: int, value):
     '''
@@ -144,23 +313,30 @@ def count_neighbours(board: list, row: int, col: int, value):
         >>> count_neighbours([['⚑', '?'], ['?', '?']], 0, 0, '?')
         3
     '''
-    neighbours = get_neighbour_positions(board, row, col)
+    if isinstance(board, Board):
+        table = neighbour_table(board.nb_rows, board.nb_cols)
+        index = row * board.nb_cols + col
+        values = board.values
+        cells = board.cells
+        return sum(1 for offset in table.offsets(row, col)
+                   if values[cells[index + offset]] == value)
+
     counter = 0
-    for pos in neighbours:
-        r = pos[0]
-        c = pos[1]
-        if board[r][c] == value:
+    for dr, dc in neighbour_table(len(board), len(board[0])).steps(row, col):
+        if board[row + dr][col + dc] == value:
             counter += 1
     return counter
 
 # 2: Helper board
 
-def new_mine_position(board: list):
+def new_mine_position(board: list, rng=random):
     '''
     Generate a random position on the board that doesn't contain a mine.
 
     Parameters:
         board (2D list): The helper board.
+        rng (random.Random): Generator to draw from; the random module
+            (its shared generator) by default.
 
     Returns:
         tuple[int, int]: A tuple representing the (row, col) of the new mine.
@@ -180,18 +356,19 @@ def new_mine_position(board: list):
     cols = len(board[0])
 
     while True:
-        int_1 = random.randint(0, rows - 1)
-        int_2 = random.randint(0, cols - 1 )
+        int_1 = rng.randint(0, rows - 1)
+        int_2 = rng.randint(0, cols - 1 )
         
         if board[int_1][int_2] != -1:
             return int_1, int_2
 
-def new_mine(board: list):
+def new_mine(board: list, rng=random):
     '''
     Add a mine to a random valid position and increment nearby cell counts.
 
     Parameters:
         board (2D list): The helper board.
+        rng (random.Random): Generator to draw from.
 
     Returns:
         None
@@ -218,18 +395,17 @@ def new_mine(board: list):
         >>> board
         [[1, 1, 1, 0], [1, -1, 2, 1], [0, 1, -1, 1], [0, 1, 1, 1]]
     '''
-    pos = new_mine_position(board)
+    pos = new_mine_position(board, rng)
     row = pos[0]
     col = pos[1]
     board[row][col] = -1
 
-    for i in range(row - 1, row + 2):
-        for j in range(col - 1, col + 2):
-            if 0 <= i < len(board) and 0 <= j < len(board[0]):
-                if board[i][j] != -1:
-                    board[i][j] += 1
+    for dr, dc in neighbour_table(len(board), len(board[0])).steps(row, col):
+        if board[row + dr][col + dc] != -1:
+            board[row + dr][col + dc] += 1
     
-def generate_helper_board(nb_rows :int, nb_cols: int, nb_mines: int):
+def generate_helper_board(nb_rows :int, nb_cols: int, nb_mines: int,
+                          rng=random):
     '''
     Create a helper board with mine positions and adjacent mine counts.
 
@@ -237,6 +413,8 @@ def generate_helper_board(nb_rows :int, nb_cols: int, nb_mines: int):
         nb_rows (int): Number of rows.
         nb_cols (int): Number of columns.
         nb_mines (int): Number of mines.
+        rng (random.Random): Generator to draw from, such as
+            random.Random(seed) for a board that can be made again.
 
     Returns:
         2D list of integers: A helper board containing 
@@ -254,18 +432,114 @@ def generate_helper_board(nb_rows :int, nb_cols: int, nb_mines: int):
         >>> random.seed(202)
         >>> generate_helper_board(2, 5, 2)
         [[0, 1, -1, 1, 0], [0, 1, 1, 1, 0]]
+
+        >>> generate_helper_board(2, 2, 1, random.Random(7))
+        [[1, 1], [-1, 1]]
     '''
     board = init_board(nb_rows, nb_cols, 0)
-    counter = 0
-    while counter < nb_mines:
-        new_mine(board)
-        counter = 0
-        for row in board:
-            for i in row:
-                if i == -1:
-                    counter += 1
+    # new_mine always adds exactly one mine, so no recount is needed
+    for i in range(nb_mines):
+        new_mine(board, rng)
+    return board
+
+def generate_helper_board_fast(nb_rows: int, nb_cols: int, nb_mines: int,
+                               seed=None, safe_cells=()):
+    '''
+    Create a compact helper board in a single pass.
+
+    Mine positions are sampled without replacement, then every count is
+    obtained from a 3x3 neighbourhood sum done row by row, so the cost
+    does not grow with the mine density. Passing a seed uses a private
+    random generator, which always gives back the same board.
+
+    Parameters:
+        nb_rows (int): Number of rows.
+        nb_cols (int): Number of columns.
+        nb_mines (int): Number of mines.
+        seed (int or None): Seed for a reproducible board, or None to
+            use the random module.
+        safe_cells (collection): (row, col) cells that must not hold
+            a mine.
+
+    Returns:
+        Board: A helper board containing mine values (-1) and numbers.
+
+    Examples:
+        >>> board = generate_helper_board_fast(3, 3, 2, seed=202)
+        >>> board.to_list()
+        [[0, 0, 0], [2, 2, 1], [-1, -1, 1]]
+        >>> generate_helper_board_fast(3, 3, 2, seed=202) == board
+        True
+        >>> count_total(generate_helper_board_fast(40, 50, 1000), -1)
+        1000
+        >>> generate_helper_board_fast(2, 2, 3, safe_cells=[(0, 0)]).to_list()
+        [[3, -1], [-1, -1]]
+    '''
+    if seed is None:
+        rng = random
+    else:
+        rng = random.Random(seed)
+    # Mines on a grid padded with an empty border, so that every
+    # 3x3 sum below can be done on whole shifted slices at once
+    width = nb_cols + 2
+    padded = bytearray((nb_rows + 2) * width)
+    cells = range(nb_rows * nb_cols)
+    if safe_cells:
+        excluded = {row * nb_cols + col for row, col in safe_cells}
+        cells = [i for i in cells if i not in excluded]
+    mark = 1
+    if nb_mines * 2 > len(cells):
+        # Fewer draws to pick the safe cells out of a board of mines
+        for r in range(1, nb_rows + 1):
+            padded[r * width + 1:r * width + 1 + nb_cols] = \
+                bytes([1]) * nb_cols
+        for row, col in safe_cells:
+            padded[(row + 1) * width + col + 1] = 0
+        nb_mines = len(cells) - nb_mines
+        mark = 0
+    for index in rng.sample(cells, nb_mines):
+        padded[(index // nb_cols + 1) * width + index % nb_cols + 1] = mark
+
+    board = Board(nb_rows, nb_cols, 0)
+    board.cells = bytearray(padded_mine_codes(padded, nb_rows, nb_cols))
     return board
 
+def padded_mine_codes(padded: bytearray, nb_rows: int, nb_cols: int):
+    '''
+    Compute the helper codes of a grid of mines (1 for a mine) stored
+    row by row with a one cell border around it, using 3x3 sums over
+    shifted slices of the whole grid.
+
+    Parameters:
+        padded (bytearray): The (nb_rows + 2) x (nb_cols + 2) grid.
+        nb_rows (int): Number of rows inside the border.
+        nb_cols (int): Number of columns inside the border.
+
+    Returns:
+        bytes: The code of every cell inside the border, row by row.
+
+    Examples:
+        >>> padded = bytearray(5 * 4)
+        >>> padded[1 * 4 + 1] = 1
+        >>> list(padded_mine_codes(padded, 3, 2))
+        [9, 1, 1, 1, 0, 0]
+    '''
+    width = nb_cols + 2
+
+    # Horizontal sums, then vertical sums of those (cell included)
+    rows_sum = bytes(1) + bytes(map(operator.add, map(operator.add,
+        padded[:-2], padded[1:-1]), padded[2:])) + bytes(1)
+    block_sum = bytes(map(operator.add, map(operator.add,
+        rows_sum[:-2 * width], rows_sum[width:-width]),
+        rows_sum[2 * width:]))
+
+    # A mine adds 16 so the translation turns it into MINE_CODE
+    marked = bytes(map(operator.add, block_sum,
+                       padded[width:-width].translate(MINE_MARKS)))
+    codes = marked.translate(MINE_COUNTS)
+    return b"".join(codes[r * width + 1:r * width + 1 + nb_cols]
+                    for r in range(nb_rows))
+
 # 3: The Game Board
 
 def flag(board: list, row: int, col: int):
@@ -343,6 +617,93 @@ def reveal(helper_board: list, game_board: list, row: int, col: int):
         game_board[row][col] = str(value)
 
 
+def reveal_cascade(helper_board: list, game_board: list, row: int, col: int):
+    '''
+    Reveal a cell and, if it has no neighbouring mine, every connected
+    zero cell along with the numbered cells bordering them.
+
+    The region is filled with an explicit stack, so any size of empty
+    region can be opened. Flagged cells are left as they are.
+    If the revealed cell contains a mine, an AssertionError is raised.
+
+    Parameters:
+        helper_board (2D list): Board with mine data.
+        game_board (2D list): Player's visible board.
+        row (int): Row index.
+        col (int): Column index.
+
+    Returns:
+        list[tuple[int, int]]: The (row, col) of every revealed cell,
+        starting with the chosen one.
+
+    Examples:
+        >>> helper_board = [[0, 0, 0], [0, 1, 1], [0, 1, -1]]
+        >>> game_board = init_board(3, 3, HIDDEN_SYMBOL)
+        >>> reveal_cascade(helper_board, game_board, 0, 0)
+        [(0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 1), (0, 2), (1, 2)]
+        >>> game_board
+        [['0', '0', '0'], ['0', '1', '1'], ['0', '1', '?']]
+        >>> reveal_cascade(helper_board, game_board, 2, 2)
+        Traceback (most recent call last):
+        AssertionError: BOOM! You lost.
+    '''
+    if isinstance(game_board, ChunkedView):
+        # An empty region of an unbounded board may never end
+        return game_board.board.reveal_cascade(row, col)
+
+    reveal(helper_board, game_board, row, col)
+    changed = [(row, col)]
+    if helper_board[row][col] != 0:
+        return changed
+
+    table = neighbour_table(len(game_board), len(game_board[0]))
+    if isinstance(helper_board, Board) and isinstance(game_board, Board):
+        return changed + cascade_cells(table, helper_board.cells,
+                                       game_board.cells, row, col)
+
+    stack = [(row, col)]
+    while stack:
+        r, c = stack.pop()
+        for dr, dc in table.steps(r, c):
+            if game_board[r + dr][c + dc] == HIDDEN_SYMBOL:
+                reveal(helper_board, game_board, r + dr, c + dc)
+                changed.append((r + dr, c + dc))
+                if helper_board[r + dr][c + dc] == 0:
+                    stack.append((r + dr, c + dc))
+    return changed
+
+
+def cascade_cells(table, helper_cells: bytearray, game_cells: bytearray,
+                  row: int, col: int):
+    '''
+    Fill the empty region around a revealed zero cell directly on the
+    buffers of two Boards; used by reveal_cascade.
+
+    Returns:
+        list[tuple[int, int]]: The (row, col) of every cell revealed
+        by the fill, not including the starting cell.
+    '''
+    nb_cols = table.nb_cols
+    row_kinds = table.row_kinds
+    col_kinds = table.col_kinds
+    kind_offsets = table.kind_offsets
+    changed = []
+    stack = [row * nb_cols + col]
+    while stack:
+        index = stack.pop()
+        r, c = divmod(index, nb_cols)
+        for offset in kind_offsets[row_kinds[r] * 4 + col_kinds[c]]:
+            neighbour = index + offset
+            if game_cells[neighbour] == HIDDEN_CODE:
+                # Neighbours of a zero are never mines
+                code = helper_cells[neighbour]
+                game_cells[neighbour] = code
+                changed.append(divmod(neighbour, nb_cols))
+                if code == 0:
+                    stack.append(neighbour)
+    return changed
+
+
 def print_board(board: list):
     '''
     Print the board neatly row by row.
@@ -402,6 +763,10 @@ def count_unrevealed_non_mines(helper_board: list, game_board: list):
         >>> count_unrevealed_non_mines(helper_board, game_board)
         3
     '''
+    if isinstance(helper_board, Board) and isinstance(game_board, Board):
+        return sum(1 for h, g in zip(helper_board.cells, game_board.cells)
+                   if h != MINE_CODE and g == HIDDEN_CODE)
+
     count = 0
     rows = len(helper_board)
     cols = len(helper_board[0])
@@ -430,27 +795,41 @@ def play():
         mines = int(HARD_PERCENT * (rows * cols))
     
     helper_board = generate_helper_board(rows, cols, mines)
-    game_board = init_board(rows, cols, HIDDEN_SYMBOL)
-    flag_count = 0
+    game_board = CowBoard(init_board(rows, cols, HIDDEN_SYMBOL))
+    state = GameState(helper_board, game_board)
+    history = BoardHistory(game_board, state)
+    renderer = BoardRenderer()
+    changed = None
 
-    while count_unrevealed_non_mines(helper_board, game_board) > 0:
+    while not state.won():
         # Calculate remaining mines based on flags placed
-        mines_remaining = mines - flag_count
-        print("Current Board: (" + str(mines_remaining) + " mines remaining)")
-        print_board(game_board)
-
-        # Ask player whether to reveal a cell or place/remove a flag
-        flag_state = int(input("Choose 0 to reveal or 1 to flag: "))
+        mines_remaining = mines - state.flagged
+        renderer.draw(game_board, "Current Board: (" + str(mines_remaining)
+                      + " mines remaining)", changed)
+
+        # Ask player whether to reveal a cell, place/remove a flag or
+        # take back the last move
+        flag_state = int(input("Choose 0 to reveal, 1 to flag or 2 to undo: "))
+        if flag_state == 2:
+            changed = history.undo()
+            continue
         row = int(input("Which row? "))
         col = int(input("Which col? "))
 
+        # Only a move that changes the board is saved for undo: both
+        # revealing and flagging leave an uncovered cell as it is
+        if flag_state not in (0, 1) or \
+                game_board[row][col] not in (HIDDEN_SYMBOL, FLAG_SYMBOL):
+            continue
+        history.checkpoint()
+
         if flag_state == 0:
-        # Reveal the chosen cell
-            reveal(helper_board, game_board, row, col)
-        elif flag_state == 1:
+        # Reveal the chosen cell and any empty region around it
+            changed = state.reveal_cascade(row, col)
+        else:
         # Toggle a flag on the chosen cell
-            flag(game_board, row, col)
-            flag_count += 1
+            state.flag(row, col)
+            changed = [(row, col)]
 
     print("Congratulations! You won!")
     for r in range(len(helper_board)):
@@ -462,13 +841,16 @@ def play():
 
 # 5: Bot
 
-def solve_cell(board: list, row: int, col: int, left_click, right_click):
+def solve_cell(board: list, row: int, col: int, left_click, right_click,
+               state=None):
     '''
     Analyze a cell and take action based on surrounding clues.
     If the number of flagged neighbours equals the cell number,
     it reveals all remaining hidden neighbours.
     If the number of hidden neighbours equals remaining mines, 
     it flags those cells.
+    When a GameState of the board is given, its neighbour counts are
+    used to skip cells where neither rule applies.
     '''
     cell = board[row][col]
 
@@ -478,32 +860,3181 @@ def solve_cell(board: list, row: int, col: int, left_click, right_click):
     
     # Convert string to integer
     num = int(cell)
-    
-    # Get neighbours
-    neighbours = get_neighbour_positions(board, row, col)
 
-    # Count flagged and hidden neighbors
-    flagged_count = count_neighbours(board, row, col, FLAG_SYMBOL)
-    hidden_count = count_neighbours(board, row, col, HIDDEN_SYMBOL)
+    if state is not None:
+        index = row * state.nb_cols + col
+        hidden_count = state.hidden_neighbours[index]
+        flagged_count = state.flagged_neighbours[index]
+        if hidden_count == 0 or (flagged_count != num and
+                                 hidden_count != num - flagged_count):
+            return
+    
+    # Collect hidden neighbours and count flagged ones in one pass
+    hidden = []
+    flagged_count = 0
+    for dr, dc in neighbour_table(len(board), len(board[0])).steps(row, col):
+        value = board[row + dr][col + dc]
+        if value == HIDDEN_SYMBOL:
+            hidden.append((row + dr, col + dc))
+        elif value == FLAG_SYMBOL:
+            flagged_count += 1
 
     if flagged_count == num:
-        for pos in neighbours:
-            r, c = pos
+        for r, c in hidden:
             if board[r][c] == HIDDEN_SYMBOL:
                 left_click(r, c)
                 
-    if hidden_count == num - flagged_count:
-        for pos in neighbours:
-            r, c = pos
+    if len(hidden) == num - flagged_count:
+        for r, c in hidden:
             if board[r][c] == HIDDEN_SYMBOL:
                 right_click(r, c)
     
-def solve(board: list, left_click, right_click):
+def solve(board: list, left_click, right_click, state=None, stats=None):
     '''
     Run the bot to repeatedly call solve_cell until the game is solved.
     The bot continues making deductions until no hidden cells remain.
+    With a GameState whose reveal and flag methods back left_click and
+    right_click, the end of the game is read from its hidden count
+    instead of scanning the board on every sweep.
+    With a SolverStats, every sweep is counted and timed, and the cells
+    clicked by the two rules of solve_cell are recorded as the
+    solve_cell_reveal and solve_cell_flag deductions.
     '''
-    while count_total(board, HIDDEN_SYMBOL) > 0:
+    if stats is not None:
+        left_click, right_click = stats.wrap_clicks(left_click, right_click)
+    while (state.hidden if state is not None else
+           count_total(board, HIDDEN_SYMBOL)) > 0:
+        if stats is not None:
+            left_clicks = stats.counters.get('left_clicks', 0)
+            right_clicks = stats.counters.get('right_clicks', 0)
+            start = time.perf_counter()
         for r in range(len(board)):
             for c in range(len(board[0])):
-                solve_cell(board, r, c, left_click, right_click)
\ No newline at end of file
+                solve_cell(board, r, c, left_click, right_click, state)
+        if stats is not None:
+            stats.record_sweep(time.perf_counter() - start)
+            stats.count('solve_cell_calls', len(board) * len(board[0]))
+            stats.record_deductions('solve_cell_reveal', stats.counters.get(
+                'left_clicks', 0) - left_clicks)
+            stats.record_deductions('solve_cell_flag', stats.counters.get(
+                'right_clicks', 0) - right_clicks)
+
+# 6: Compact board
+
+# Cell codes stored in a Board: 0-8 are neighbour counts, followed by
+# the mine marker and the two states that keep a cell covered.
+MINE_CODE = 9
+HIDDEN_CODE = 10
+FLAG_CODE = 11
+
+# Every value a cell can hold (helper ints or game board strings)
+# mapped to its one-byte code
+CELL_CODES = {HIDDEN_SYMBOL: HIDDEN_CODE, FLAG_SYMBOL: FLAG_CODE,
+              -1: MINE_CODE, '-1': MINE_CODE}
+CELL_CODES.update({n: n for n in range(9)})
+CELL_CODES.update({str(n): n for n in range(9)})
+
+# Code to value tables, one for helper boards and one for game boards
+HELPER_VALUES = tuple(range(9)) + (-1, HIDDEN_SYMBOL, FLAG_SYMBOL)
+GAME_VALUES = tuple(str(n) for n in range(9)) + \
+    ('-1', HIDDEN_SYMBOL, FLAG_SYMBOL)
+
+
+class BoardRow:
+    '''
+    A view of one row of a Board, so that board[row][col] reads and
+    writes the compact buffer like a nested list would.
+    '''
+
+    def __init__(self, board, row: int):
+        self.board = board
+        self.start = row * board.nb_cols
+
+    def __len__(self):
+        return self.board.nb_cols
+
+    def __getitem__(self, col: int):
+        cols = self.board.nb_cols
+        if col < 0:
+            col += cols
+        if not 0 <= col < cols:
+            raise IndexError("column index out of range")
+        return self.board.values[self.board.cells[self.start + col]]
+
+    def __setitem__(self, col: int, value):
+        cols = self.board.nb_cols
+        if col < 0:
+            col += cols
+        if not 0 <= col < cols:
+            raise IndexError("column index out of range")
+        self.board.cells[self.start + col] = CELL_CODES[value]
+
+    def __iter__(self):
+        cells = self.board.cells[self.start:self.start + self.board.nb_cols]
+        return map(self.board.values.__getitem__, cells)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class Board:
+    '''
+    A board stored as a flat bytearray with one byte per cell instead of
+    a list of lists. Cells are read and written with board[row][col]
+    (or board[row, col]), so every function of this program accepts a
+    Board wherever it accepts a 2D list.
+
+    A board built from a string value is a game board and gives back
+    strings ('?', '⚑', '0' to '8'); any other board is a helper board
+    and gives back ints (-1 to 8).
+
+    Parameters:
+        nb_rows (int): Number of rows in the board.
+        nb_cols (int): Number of columns in the board.
+        value (any): Value to fill each cell with.
+
+    Examples:
+        >>> board = Board(2, 3, 0)
+        >>> board[1][2] = -1
+        >>> board[1][2], board[0, 0]
+        (-1, 0)
+        >>> board.to_list()
+        [[0, 0, 0], [0, 0, -1]]
+        >>> game = Board(2, 2, HIDDEN_SYMBOL)
+        >>> game[0][1] = '3'
+        >>> game
+        Board([['?', '3'], ['?', '?']])
+        >>> len(game.cells)
+        4
+    '''
+
+    def __init__(self, nb_rows: int, nb_cols: int, value=0):
+        self.nb_rows = nb_rows
+        self.nb_cols = nb_cols
+        if isinstance(value, str):
+            self.values = GAME_VALUES
+        else:
+            self.values = HELPER_VALUES
+        self.cells = bytearray([CELL_CODES[value]]) * (nb_rows * nb_cols)
+
+    @classmethod
+    def from_list(cls, board: list):
+        '''
+        Build a Board holding the same values as a 2D list.
+
+        Parameters:
+            board (2D list): The board to convert.
+
+        Returns:
+            Board: The compact copy of the board.
+
+        Examples:
+            >>> Board.from_list([[0, 1], [-1, 1]])[1][0]
+            -1
+            >>> Board.from_list([['?', '⚑']]).to_list()
+            [['?', '⚑']]
+        '''
+        nb_rows = len(board)
+        nb_cols = len(board[0])
+        compact = cls(nb_rows, nb_cols, board[0][0])
+        compact.cells = bytearray(CELL_CODES[value]
+                                  for row in board for value in row)
+        return compact
+
+    def to_list(self):
+        '''
+        Convert the board back to the 2D list form.
+
+        Returns:
+            list[list]: A 2D list with the board values.
+        '''
+        cols = self.nb_cols
+        cells = self.cells
+        decode = self.values.__getitem__
+        return [list(map(decode, cells[start:start + cols]))
+                for start in range(0, len(cells), cols)]
+
+    def copy(self):
+        '''
+        Return an independent copy of the board.
+        '''
+        duplicate = Board(0, 0)
+        duplicate.nb_rows = self.nb_rows
+        duplicate.nb_cols = self.nb_cols
+        duplicate.values = self.values
+        duplicate.cells = bytearray(self.cells)
+        return duplicate
+
+    def cell_index(self, row: int, col: int):
+        '''
+        Return the position of a cell in the cells buffer. Negative
+        indices count from the end as for board[row][col].
+
+        Raises:
+            IndexError: If the cell is outside the board.
+
+        Examples:
+            >>> board = Board(2, 3, 0)
+            >>> board.cell_index(1, 0), board.cell_index(-1, -1)
+            (3, 5)
+            >>> board[0, 3]
+            Traceback (most recent call last):
+            IndexError: column index out of range
+        '''
+        if row < 0:
+            row += self.nb_rows
+        if not 0 <= row < self.nb_rows:
+            raise IndexError("row index out of range")
+        if col < 0:
+            col += self.nb_cols
+        if not 0 <= col < self.nb_cols:
+            raise IndexError("column index out of range")
+        return row * self.nb_cols + col
+
+    def get(self, row: int, col: int):
+        '''
+        Return the value of a cell.
+        '''
+        return self.values[self.cells[self.cell_index(row, col)]]
+
+    def set(self, row: int, col: int, value):
+        '''
+        Store a value in a cell.
+        '''
+        self.cells[self.cell_index(row, col)] = CELL_CODES[value]
+
+    def count(self, value):
+        '''
+        Count how many cells hold the given value.
+
+        Examples:
+            >>> Board.from_list([['?', '1'], ['?', '?']]).count('?')
+            3
+        '''
+        code = CELL_CODES.get(value)
+        if code is None or self.values[code] != value:
+            return 0
+        return self.cells.count(code)
+
+    def __len__(self):
+        return self.nb_rows
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.values[self.cells[self.cell_index(*key)]]
+        if key < 0:
+            key += self.nb_rows
+        if not 0 <= key < self.nb_rows:
+            raise IndexError("row index out of range")
+        return BoardRow(self, key)
+
+    def __setitem__(self, key: tuple, value):
+        self.cells[self.cell_index(*key)] = CELL_CODES[value]
+
+    def __iter__(self):
+        for row in range(self.nb_rows):
+            yield BoardRow(self, row)
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.values is other.values and \
+                self.nb_cols == other.nb_cols and self.cells == other.cells
+        return self.to_list() == other
+
+    def __repr__(self):
+        return "Board(" + repr(self.to_list()) + ")"
+
+
+# 7: Game state
+
+class GameState:
+    '''
+    Running counts for a game, kept up to date by every reveal and flag
+    so that no check has to scan the board.
+
+    Moves must go through the reveal and flag methods (or be reported
+    with update) for the counts to stay correct.
+
+    Parameters:
+        helper_board (2D list or Board): Board with mine data.
+        game_board (2D list or Board): Player's visible board.
+
+    Attributes:
+        hidden (int): Cells showing HIDDEN_SYMBOL.
+        flagged (int): Cells showing FLAG_SYMBOL.
+        unrevealed_safe (int): Non-mine cells showing HIDDEN_SYMBOL.
+        hidden_neighbours (bytearray): Hidden neighbours of each cell,
+            by flat index (row * nb_cols + col).
+        flagged_neighbours (bytearray): Flagged neighbours of each cell.
+
+    Examples:
+        >>> helper_board = [[0, 1], [1, -1]]
+        >>> game_board = init_board(2, 2, HIDDEN_SYMBOL)
+        >>> state = GameState(helper_board, game_board)
+        >>> state.hidden, state.unrevealed_safe
+        (4, 3)
+        >>> state.reveal(0, 0)
+        >>> state.flag(1, 1)
+        >>> state.hidden, state.flagged, state.unrevealed_safe
+        (2, 1, 2)
+        >>> state.hidden_neighbours[0], state.flagged_neighbours[0]
+        (2, 1)
+        >>> state.won()
+        False
+    '''
+
+    def __init__(self, helper_board, game_board):
+        self.helper_board = helper_board
+        self.game_board = game_board
+        self.nb_rows = len(game_board)
+        self.nb_cols = len(game_board[0])
+        self.table = neighbour_table(self.nb_rows, self.nb_cols)
+
+        self.hidden = count_total(game_board, HIDDEN_SYMBOL)
+        self.flagged = count_total(game_board, FLAG_SYMBOL)
+        self.unrevealed_safe = count_unrevealed_non_mines(helper_board,
+                                                          game_board)
+        self.hidden_neighbours = bytearray(self.nb_rows * self.nb_cols)
+        self.flagged_neighbours = bytearray(self.nb_rows * self.nb_cols)
+        for r in range(self.nb_rows):
+            for c in range(self.nb_cols):
+                value = game_board[r][c]
+                if value == HIDDEN_SYMBOL:
+                    self.shift_neighbours(self.hidden_neighbours, r, c, 1)
+                elif value == FLAG_SYMBOL:
+                    self.shift_neighbours(self.flagged_neighbours, r, c, 1)
+
+    def shift_neighbours(self, counts: bytearray, row: int, col: int,
+                         amount: int):
+        '''
+        Add amount to the count of every neighbour of a cell.
+        '''
+        index = row * self.nb_cols + col
+        for offset in self.table.offsets(row, col):
+            counts[index + offset] += amount
+
+    def update(self, row: int, col: int, old):
+        '''
+        Adjust the counts after a cell changed from the value old to
+        its current value on the game board.
+
+        Parameters:
+            row (int): Row index.
+            col (int): Column index.
+            old (str): The value the cell had before the move.
+
+        Returns:
+            None
+        '''
+        new = self.game_board[row][col]
+        if new == old:
+            return
+        is_safe = self.helper_board[row][col] != -1
+
+        if old == HIDDEN_SYMBOL:
+            self.hidden -= 1
+            self.unrevealed_safe -= is_safe
+            self.shift_neighbours(self.hidden_neighbours, row, col, -1)
+        elif old == FLAG_SYMBOL:
+            self.flagged -= 1
+            self.shift_neighbours(self.flagged_neighbours, row, col, -1)
+
+        if new == HIDDEN_SYMBOL:
+            self.hidden += 1
+            self.unrevealed_safe += is_safe
+            self.shift_neighbours(self.hidden_neighbours, row, col, 1)
+        elif new == FLAG_SYMBOL:
+            self.flagged += 1
+            self.shift_neighbours(self.flagged_neighbours, row, col, 1)
+
+    def reveal(self, row: int, col: int):
+        '''
+        Reveal a cell like reveal does and update the counts.
+        '''
+        old = self.game_board[row][col]
+        reveal(self.helper_board, self.game_board, row, col)
+        self.update(row, col, old)
+
+    def reveal_cascade(self, row: int, col: int):
+        '''
+        Reveal a cell like reveal_cascade does and update the counts.
+
+        Returns:
+            list[tuple[int, int]]: The (row, col) of every revealed cell.
+        '''
+        old = self.game_board[row][col]
+        changed = reveal_cascade(self.helper_board, self.game_board,
+                                 row, col)
+        self.update(row, col, old)
+        # Every other cell of the cascade was hidden before
+        for r, c in changed[1:]:
+            self.update(r, c, HIDDEN_SYMBOL)
+        return changed
+
+    def flag(self, row: int, col: int):
+        '''
+        Toggle a flag like flag does and update the counts.
+        '''
+        old = self.game_board[row][col]
+        flag(self.game_board, row, col)
+        self.update(row, col, old)
+
+    def won(self):
+        '''
+        Return True once every non-mine cell has been uncovered.
+        '''
+        return self.unrevealed_safe == 0
+
+
+# 8: Frontier solver
+
+def solve_frontier(board: list, left_click, right_click, state=None,
+                   stats=None):
+    '''
+    Run the bot on a worklist of frontier cells instead of sweeping the
+    whole board.
+
+    Every revealed cell with a hidden neighbour is queued once; after
+    that a cell is only queued again when it or one of its neighbours
+    was changed by left_click or right_click. The bot stops when the
+    queue is empty, so the work follows the frontier and the bot can
+    no longer loop forever on a board it cannot finish.
+
+    Parameters:
+        board (2D list): The game board.
+        left_click (function): Called with (row, col) to reveal a cell.
+            It may return the list of cells it revealed.
+        right_click (function): Called with (row, col) to flag a cell.
+        state (GameState or None): Optional counts of the board, as
+            for solve.
+        stats (SolverStats or None): Collects counts and timings.
+
+    Returns:
+        str: SOLVED if no hidden cell is left, STUCK otherwise.
+
+    Examples:
+        >>> helper_board = [[0, 1, -1], [0, 1, 1], [0, 0, 0]]
+        >>> game_board = init_board(3, 3, HIDDEN_SYMBOL)
+        >>> reveal(helper_board, game_board, 0, 0)
+        >>> left = lambda r, c: reveal(helper_board, game_board, r, c)
+        >>> right = lambda r, c: flag(game_board, r, c)
+        >>> solve_frontier(game_board, left, right)
+        'solved'
+        >>> game_board
+        [['0', '1', '⚑'], ['0', '1', '1'], ['0', '0', '0']]
+
+        >>> helper_board = [[1, -1], [1, -1]]
+        >>> game_board = [['1', '?'], ['?', '?']]
+        >>> solve_frontier(game_board, left, right)
+        'stuck'
+    '''
+    if stats is not None:
+        left_click, right_click = stats.wrap_clicks(left_click, right_click)
+        start = time.perf_counter()
+    nb_rows = len(board)
+    nb_cols = len(board[0])
+    table = neighbour_table(nb_rows, nb_cols)
+    queue = collections.deque()
+    queued = bytearray(nb_rows * nb_cols)
+    changed = []
+    # Cells clicked by each rule of solve_cell for the current cell
+    clicked = [0, 0]
+
+    def enqueue(row, col):
+        index = row * nb_cols + col
+        value = board[row][col]
+        if not queued[index] and value != HIDDEN_SYMBOL \
+                and value != FLAG_SYMBOL:
+            queued[index] = 1
+            queue.append((row, col))
+
+    # Only record moves that really changed the board, so every
+    # recorded change uncovers or flags a cell and the loop must end.
+    # A left_click that returns the cells it revealed (such as
+    # GameState.reveal_cascade) has all of them queued, but only the
+    # clicked cell counts as a deduction; the others are counted as
+    # cascade_cells.
+    def on_left_click(row, col):
+        revealed = left_click(row, col)
+        if board[row][col] != HIDDEN_SYMBOL:
+            changed.append((row, col))
+            clicked[0] += 1
+        if revealed:
+            changed.extend(revealed)
+            if stats is not None:
+                stats.count('cascade_cells', sum(
+                    1 for cell in revealed if cell != (row, col)))
+
+    def on_right_click(row, col):
+        right_click(row, col)
+        if board[row][col] != HIDDEN_SYMBOL:
+            changed.append((row, col))
+            clicked[1] += 1
+
+    for r in range(nb_rows):
+        for c in range(nb_cols):
+            if any(board[r + dr][c + dc] == HIDDEN_SYMBOL
+                   for dr, dc in table.steps(r, c)):
+                enqueue(r, c)
+
+    while queue:
+        row, col = queue.popleft()
+        queued[row * nb_cols + col] = 0
+        clicked[0] = clicked[1] = 0
+        solve_cell(board, row, col, on_left_click, on_right_click, state)
+        if stats is not None:
+            stats.count('solve_cell_calls')
+            stats.record_deductions('solve_cell_reveal', clicked[0])
+            stats.record_deductions('solve_cell_flag', clicked[1])
+
+        # Queue the changed cells and everything around them
+        while changed:
+            r, c = changed.pop()
+            enqueue(r, c)
+            for dr, dc in table.steps(r, c):
+                enqueue(r + dr, c + dc)
+
+    if state is not None:
+        hidden = state.hidden
+    else:
+        hidden = count_total(board, HIDDEN_SYMBOL)
+    if stats is not None:
+        stats.add_time('frontier', time.perf_counter() - start)
+    if hidden > 0:
+        return STUCK
+    return SOLVED
+
+
+# 9: Constraint solver
+
+def frontier_constraints(board: list, cells=None):
+    '''
+    Build the constraints given by the revealed numbers of a board.
+
+    Each revealed number next to a hidden cell gives one constraint:
+    the set of its hidden neighbours holds exactly as many mines as the
+    number minus its flagged neighbours. Flags are trusted as mines.
+
+    Parameters:
+        board (2D list): The game board.
+        cells (iterable or None): Cells to start from. Only the groups
+            of constraints (as split by split_components) holding the
+            constraint of one of these cells are built, without
+            scanning the rest of the board. None builds them all.
+
+    Returns:
+        list[tuple[frozenset, int]]: The distinct constraints, each as
+        (set of (row, col) hidden cells, number of mines among them).
+
+    Examples:
+        >>> frontier_constraints([['1', '?'], ['⚑', '?']])
+        [(frozenset({(0, 1), (1, 1)}), 0)]
+        >>> frontier_constraints([['0', '1'], ['1', '1']])
+        []
+        >>> board = [['1', '?', '1', '1', '?'], ['1', '1', '1', '1', '1']]
+        >>> frontier_constraints(board, [(1, 4)])
+        [(frozenset({(0, 4)}), 1)]
+    '''
+    nb_rows = len(board)
+    nb_cols = len(board[0])
+    table = neighbour_table(nb_rows, nb_cols)
+    constraints = []
+    seen = set()
+
+    def constraint_of(r, c):
+        hidden = []
+        flagged_count = 0
+        for dr, dc in table.steps(r, c):
+            neighbour = board[r + dr][c + dc]
+            if neighbour == HIDDEN_SYMBOL:
+                hidden.append((r + dr, c + dc))
+            elif neighbour == FLAG_SYMBOL:
+                flagged_count += 1
+        if hidden:
+            constraint = (frozenset(hidden), int(board[r][c]) - flagged_count)
+            if constraint not in seen:
+                seen.add(constraint)
+                constraints.append(constraint)
+        return hidden
+
+    if cells is None:
+        for r in range(nb_rows):
+            for c in range(nb_cols):
+                value = board[r][c]
+                if value != HIDDEN_SYMBOL and value != FLAG_SYMBOL:
+                    constraint_of(r, c)
+        return constraints
+
+    # Walk from revealed cell to hidden neighbour to revealed cell, so
+    # every constraint sharing a hidden cell with a built one is built
+    visited = set()
+    pending = []
+    for r, c in cells:
+        value = board[r][c]
+        if value != HIDDEN_SYMBOL and value != FLAG_SYMBOL and \
+                (r, c) not in visited:
+            visited.add((r, c))
+            pending.append((r, c))
+    while pending:
+        for hr, hc in constraint_of(*pending.pop()):
+            if (hr, hc) in visited:
+                continue
+            visited.add((hr, hc))
+            for dr, dc in table.steps(hr, hc):
+                r = hr + dr
+                c = hc + dc
+                value = board[r][c]
+                if value != HIDDEN_SYMBOL and value != FLAG_SYMBOL and \
+                        (r, c) not in visited:
+                    visited.add((r, c))
+                    pending.append((r, c))
+    return constraints
+
+def split_components(constraints: list):
+    '''
+    Split constraints into groups that share no hidden cell, so that
+    each group can be solved on its own.
+
+    Parameters:
+        constraints (list): Constraints as built by frontier_constraints.
+
+    Returns:
+        list[list]: The groups of constraints.
+
+    Examples:
+        >>> a = (frozenset({(0, 0), (0, 1)}), 1)
+        >>> b = (frozenset({(0, 1), (0, 2)}), 1)
+        >>> c = (frozenset({(5, 5)}), 0)
+        >>> split_components([a, b, c]) == [[a, b], [c]]
+        True
+    '''
+    # Union-find over the hidden cells
+    parent = {}
+
+    def find(cell):
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return root
+
+    for cells, count in constraints:
+        first = None
+        for cell in cells:
+            if cell not in parent:
+                parent[cell] = cell
+            if first is None:
+                first = find(cell)
+            else:
+                parent[find(cell)] = first
+                first = find(first)
+
+    groups = {}
+    for constraint in constraints:
+        root = find(next(iter(constraint[0])))
+        groups.setdefault(root, []).append(constraint)
+    return list(groups.values())
+
+def enumerate_component(constraints: list):
+    '''
+    Try every mine layout of the hidden cells of a group of constraints
+    and count the layouts that satisfy all of them.
+
+    Parameters:
+        constraints (list): One group from split_components.
+
+    Returns:
+        tuple: (cells, layouts) where cells is the sorted list of hidden
+        cells and layouts maps a number of mines to a pair (number of
+        valid layouts with that many mines, list giving for each cell
+        how many of those layouts put a mine on it).
+
+    Examples:
+        >>> a = (frozenset({(0, 0), (0, 1)}), 1)
+        >>> b = (frozenset({(0, 1), (0, 2)}), 1)
+        >>> enumerate_component([a, b])
+        ([(0, 0), (0, 1), (0, 2)], {1: [1, [0, 1, 0]], 2: [1, [1, 0, 1]]})
+    '''
+    cells = sorted({cell for con_cells, count in constraints
+                    for cell in con_cells})
+    position = {cell: i for i, cell in enumerate(cells)}
+    links = [[] for cell in cells]
+    needed = []
+    free = []
+    for k, (con_cells, count) in enumerate(constraints):
+        needed.append(count)
+        free.append(len(con_cells))
+        for cell in con_cells:
+            links[position[cell]].append(k)
+
+    layouts = {}
+    layout = [0] * len(cells)
+
+    def place(i, mines):
+        if i == len(cells):
+            entry = layouts.get(mines)
+            if entry is None:
+                entry = layouts[mines] = [0, [0] * len(cells)]
+            entry[0] += 1
+            cell_counts = entry[1]
+            for j, value in enumerate(layout):
+                cell_counts[j] += value
+            return
+        for value in (0, 1):
+            # Every constraint of the cell must stay satisfiable
+            if all(0 <= needed[k] - value <= free[k] - 1 for k in links[i]):
+                for k in links[i]:
+                    needed[k] -= value
+                    free[k] -= 1
+                layout[i] = value
+                place(i + 1, mines + value)
+                for k in links[i]:
+                    needed[k] += value
+                    free[k] += 1
+        layout[i] = 0
+
+    place(0, 0)
+    return cells, layouts
+
+def single_cell_rule(constraints: list):
+    '''
+    The two rules of solve_cell on constraints: a constraint with no
+    mine left makes all its cells safe, and one with as many mines as
+    cells makes all its cells mines.
+
+    Parameters:
+        constraints (list): Constraints as built by frontier_constraints.
+
+    Returns:
+        tuple[set, set]: The cells found safe and the cells found mined.
+
+    Examples:
+        >>> single_cell_rule([(frozenset({(0, 1)}), 0),
+        ...                   (frozenset({(1, 0), (1, 1)}), 2)])
+        ({(0, 1)}, {(1, 0), (1, 1)})
+    '''
+    safe = set()
+    mines = set()
+    for cells, count in constraints:
+        if count == 0:
+            safe |= cells
+        elif count == len(cells):
+            mines |= cells
+    return safe, mines
+
+def component_signature(constraints: list):
+    '''
+    Describe a group of constraints independently of where it sits on
+    the board: cells are numbered in row-major order and the numbered
+    constraints are sorted.
+
+    Parameters:
+        constraints (list): One group from split_components.
+
+    Returns:
+        tuple: (sorted cells, signature), where the signature is a
+        tuple of (cell numbers, mines) pairs.
+
+    Examples:
+        >>> a = (frozenset({(4, 4), (4, 5)}), 1)
+        >>> b = (frozenset({(4, 5), (4, 6)}), 1)
+        >>> component_signature([a, b])[1]
+        (((0, 1), 1), ((1, 2), 1))
+    '''
+    cells = sorted({cell for con_cells, count in constraints
+                    for cell in con_cells})
+    position = {cell: i for i, cell in enumerate(cells)}
+    signature = tuple(sorted((tuple(sorted(position[cell]
+                                           for cell in con_cells)), count)
+                             for con_cells, count in constraints))
+    return cells, signature
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def signature_layouts(signature: tuple):
+    '''
+    Count the layouts of a component signature with enumerate_component;
+    the result is cached, since the same small shapes come back on every
+    turn of a game and across games.
+
+    Returns:
+        dict: The layouts, as given by enumerate_component.
+    '''
+    constraints = [(frozenset(cells), count) for cells, count in signature]
+    return enumerate_component(constraints)[1]
+
+def component_layouts(constraints: list):
+    '''
+    Same result as enumerate_component, looked up by the signature of
+    the group so that a shape already counted is not counted again.
+
+    Examples:
+        >>> a = (frozenset({(0, 0), (0, 1)}), 1)
+        >>> b = (frozenset({(0, 1), (0, 2)}), 1)
+        >>> component_layouts([a, b]) == enumerate_component([a, b])
+        True
+    '''
+    cells, signature = component_signature(constraints)
+    return cells, signature_layouts(signature)
+
+def subset_rule(constraints: list):
+    '''
+    Deduce cells by comparing constraints: when the cells of one
+    constraint are all part of another, the extra cells of the larger
+    one hold the difference of their mines. Differences are added as
+    new constraints until nothing new comes up.
+
+    Parameters:
+        constraints (list): Constraints as built by frontier_constraints.
+
+    Returns:
+        tuple[set, set]: The cells found safe and the cells found mined.
+
+    Examples:
+        >>> a = (frozenset({(1, 0), (1, 1)}), 1)
+        >>> b = (frozenset({(1, 0), (1, 1), (1, 2)}), 1)
+        >>> subset_rule([a, b])
+        ({(1, 2)}, set())
+    '''
+    known = set(constraints)
+    pending = list(constraints)
+    by_cell = {}
+    for constraint in constraints:
+        for cell in constraint[0]:
+            by_cell.setdefault(cell, set()).add(constraint)
+
+    safe = set()
+    mines = set()
+    while pending:
+        constraint = pending.pop()
+        cells, count = constraint
+        if count == 0:
+            safe |= cells
+            continue
+        if count == len(cells):
+            mines |= cells
+            continue
+
+        others = set()
+        for cell in cells:
+            others |= by_cell[cell]
+        for other in others:
+            other_cells, other_count = other
+            if cells < other_cells:
+                derived = (other_cells - cells, other_count - count)
+            elif other_cells < cells:
+                derived = (cells - other_cells, count - other_count)
+            else:
+                continue
+            if derived not in known:
+                known.add(derived)
+                pending.append(derived)
+                for cell in derived[0]:
+                    by_cell[cell].add(derived)
+    return safe, mines
+
+def enumeration_rule(constraints: list):
+    '''
+    Deduce cells by trying every mine layout of each group of linked
+    hidden cells (up to MAX_ENUMERATION_CELLS cells): a cell that is a
+    mine in every valid layout is a mine, and a cell that is a mine in
+    none is safe.
+
+    Parameters:
+        constraints (list): Constraints as built by frontier_constraints.
+
+    Returns:
+        tuple[set, set]: The cells found safe and the cells found mined.
+
+    Examples:
+        >>> a = (frozenset({(0, 0), (0, 1)}), 1)
+        >>> b = (frozenset({(0, 1), (0, 2)}), 2)
+        >>> enumeration_rule([a, b])
+        ({(0, 0)}, {(0, 1), (0, 2)})
+    '''
+    safe = set()
+    mines = set()
+    for group in split_components(constraints):
+        group_size = len(set().union(*(cells for cells, count in group)))
+        if group_size > MAX_ENUMERATION_CELLS:
+            continue
+        cells, layouts = component_layouts(group)
+        total = sum(entry[0] for entry in layouts.values())
+        if total == 0:
+            continue
+        for j, cell in enumerate(cells):
+            mined = sum(entry[1][j] for entry in layouts.values())
+            if mined == 0:
+                safe.add(cell)
+            elif mined == total:
+                mines.add(cell)
+    return safe, mines
+
+# Rules tried in order by solve_constraints once the simple rules of
+# solve_cell are exhausted; the cheapest rule comes first
+CONSTRAINT_RULES = (subset_rule, enumeration_rule)
+
+def deduce(board: list, rules=CONSTRAINT_RULES, stats=None):
+    '''
+    Apply the rules in order to the constraints of a board and return
+    the result of the first rule that finds anything.
+
+    Parameters:
+        board (2D list): The game board.
+        rules (sequence): Functions taking a list of constraints and
+            returning a (safe cells, mined cells) pair.
+        stats (SolverStats or None): Collects the time of each step and
+            the cells found by each rule.
+
+    Returns:
+        tuple[set, set]: The cells found safe and the cells found mined.
+    '''
+    if stats is None:
+        constraints = frontier_constraints(board)
+        for rule in rules:
+            safe, mines = rule(constraints)
+            if safe or mines:
+                return safe, mines
+        return set(), set()
+
+    with stats.phase('constraints'):
+        constraints = frontier_constraints(board)
+    stats.count('constraints', len(constraints))
+    for rule in rules:
+        with stats.phase(rule.__name__):
+            safe, mines = rule(constraints)
+        stats.record_deductions(rule.__name__, len(safe) + len(mines))
+        if safe or mines:
+            return safe, mines
+    return set(), set()
+
+def solve_constraints(board: list, left_click, right_click, state=None,
+                      rules=CONSTRAINT_RULES, stats=None):
+    '''
+    Run the bot with constraint reasoning on top of the simple rules.
+
+    The frontier solver is run first; whenever it is stuck, the rules
+    are applied to the constraints of the whole frontier, their safe
+    cells are revealed and their mines flagged, and the frontier solver
+    takes over again. This solves patterns such as 1-2-1 that the two
+    rules of solve_cell cannot.
+
+    Parameters:
+        board (2D list): The game board.
+        left_click (function): Called with (row, col) to reveal a cell.
+        right_click (function): Called with (row, col) to flag a cell.
+        state (GameState or None): Optional counts of the board, as
+            for solve.
+        rules (sequence): The rules to use, as for deduce.
+        stats (SolverStats or None): Collects counts and timings.
+
+    Returns:
+        str: SOLVED if no hidden cell is left, STUCK otherwise.
+
+    Examples:
+        >>> helper_board = [[1, -1, 2, -1, 1], [1, 1, 2, 1, 1]]
+        >>> game_board = [['?'] * 5, ['1', '1', '2', '1', '1']]
+        >>> left = lambda r, c: reveal(helper_board, game_board, r, c)
+        >>> right = lambda r, c: flag(game_board, r, c)
+        >>> solve_frontier(game_board, left, right)
+        'stuck'
+        >>> solve_constraints(game_board, left, right)
+        'solved'
+        >>> print_board(game_board)
+        1 ⚑ 2 ⚑ 1
+        1 1 2 1 1
+    '''
+    if stats is not None:
+        left_click, right_click = stats.wrap_clicks(left_click, right_click)
+    while solve_frontier(board, left_click, right_click, state,
+                         stats) == STUCK:
+        if stats is not None:
+            stats.count('deduce_rounds')
+        safe, mines = deduce(board, rules, stats)
+        changed = False
+        for r, c in sorted(safe):
+            if board[r][c] == HIDDEN_SYMBOL:
+                left_click(r, c)
+                changed = changed or board[r][c] != HIDDEN_SYMBOL
+        for r, c in sorted(mines):
+            if board[r][c] == HIDDEN_SYMBOL:
+                right_click(r, c)
+                changed = changed or board[r][c] != HIDDEN_SYMBOL
+        if not changed:
+            return STUCK
+    return SOLVED
+
+
+# 10: Simulation
+
+def simulate_game(nb_rows: int, nb_cols: int, nb_mines: int, seed: int,
+                  solver=solve_frontier):
+    '''
+    Play one game with the bot, without any input or output.
+
+    The board comes from generate_helper_board_fast with the given
+    seed. The opening move reveals a zero cell picked with the same
+    seed (any safe cell if there is no zero), then the solver plays
+    with left_click and right_click wired to a GameState. The game is
+    lost if the solver hits a mine or gets stuck.
+
+    Parameters:
+        nb_rows (int): Number of rows.
+        nb_cols (int): Number of columns.
+        nb_mines (int): Number of mines.
+        seed (int): Seed of the board and of the opening move.
+        solver (function): A solver taking (board, left_click,
+            right_click, state), such as solve_frontier.
+
+    Returns:
+        dict: 'won' (bool) and 'moves' (int, clicks of the bot
+        including the opening move).
+
+    Examples:
+        >>> simulate_game(9, 9, 10, seed=4)
+        {'won': True, 'moves': 29}
+        >>> simulate_game(9, 9, 10, seed=1)
+        {'won': False, 'moves': 1}
+    '''
+    rng = random.Random(seed)
+    helper_board = generate_helper_board_fast(nb_rows, nb_cols, nb_mines,
+                                              seed=rng.getrandbits(64))
+    game_board = Board(nb_rows, nb_cols, HIDDEN_SYMBOL)
+    state = GameState(helper_board, game_board)
+    moves = 0
+
+    def left_click(row, col):
+        nonlocal moves
+        moves += 1
+        return state.reveal_cascade(row, col)
+
+    def right_click(row, col):
+        nonlocal moves
+        moves += 1
+        state.flag(row, col)
+
+    openings = [i for i, code in enumerate(helper_board.cells) if code == 0]
+    if not openings:
+        openings = [i for i, code in enumerate(helper_board.cells)
+                    if code != MINE_CODE]
+    if openings:
+        try:
+            left_click(*divmod(rng.choice(openings), nb_cols))
+            solver(game_board, left_click, right_click, state)
+        except AssertionError:
+            return {'won': False, 'moves': moves}
+    return {'won': state.won(), 'moves': moves}
+
+def simulate_games(nb_games: int, nb_rows: int, nb_cols: int,
+                   difficulty: str = "EASY", seed: int = 0, workers=None,
+                   solver=solve_frontier):
+    '''
+    Play many seeded games with simulate_game across a process pool.
+
+    Every game gets its own seed drawn from the given seed, so the same
+    call always plays the same games whatever the number of workers.
+
+    Parameters:
+        nb_games (int): Number of games to play.
+        nb_rows (int): Number of rows of each board.
+        nb_cols (int): Number of columns of each board.
+        difficulty (str): One of EASY, MEDIUM or HARD.
+        seed (int): Seed the game seeds are drawn from.
+        workers (int or None): Number of processes; None uses one per
+            CPU and 1 plays every game in this process.
+        solver (function): The solver to use, as for simulate_game.
+
+    Returns:
+        dict: The report, with the difficulty, number of games, wins,
+        win rate, average moves per game, total seconds and games per
+        second.
+
+    Examples:
+        >>> report = simulate_games(20, 9, 9, "EASY", seed=1, workers=1)
+        >>> report['games'], report['wins'] <= 20
+        (20, True)
+    '''
+    nb_mines = int(DIFFICULTY_PERCENTS[difficulty] * (nb_rows * nb_cols))
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for i in range(nb_games)]
+    games = (itertools.repeat(nb_rows), itertools.repeat(nb_cols),
+             itertools.repeat(nb_mines), seeds, itertools.repeat(solver))
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = list(map(simulate_game, *games))
+    else:
+        chunk_size = max(1, nb_games // (4 * (workers or os.cpu_count())))
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(simulate_game, *games,
+                                    chunksize=chunk_size))
+    seconds = time.perf_counter() - start
+
+    wins = sum(result['won'] for result in results)
+    moves = sum(result['moves'] for result in results)
+    return {
+        'difficulty': difficulty,
+        'games': nb_games,
+        'wins': wins,
+        'win_rate': wins / nb_games if nb_games else 0.0,
+        'moves_per_game': moves / nb_games if nb_games else 0.0,
+        'seconds': seconds,
+        'games_per_second': nb_games / seconds if seconds else 0.0,
+    }
+
+def simulate_difficulties(nb_games: int, nb_rows: int, nb_cols: int,
+                          seed: int = 0, workers=None,
+                          solver=solve_frontier):
+    '''
+    Run simulate_games once for every difficulty.
+
+    Returns:
+        dict: The report of simulate_games for each difficulty name.
+    '''
+    return {difficulty: simulate_games(nb_games, nb_rows, nb_cols,
+                                       difficulty, seed, workers, solver)
+            for difficulty in DIFFICULTY_PERCENTS}
+
+
+# 11: Terminal renderer
+
+# ANSI sequences: clear the screen, and clear from the cursor down
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_BELOW = "\x1b[J"
+
+def supports_ansi(stream):
+    '''
+    Check if a stream is a terminal that understands ANSI cursor moves.
+
+    Parameters:
+        stream (file): The output stream.
+
+    Returns:
+        bool: True if the stream is an ANSI capable terminal.
+
+    Examples:
+        >>> import io
+        >>> supports_ansi(io.StringIO())
+        False
+    '''
+    isatty = getattr(stream, "isatty", None)
+    if isatty is None or not isatty():
+        return False
+    return os.environ.get("TERM", "") not in ("", "dumb")
+
+def cursor_to(row: int, col: int):
+    '''
+    Return the ANSI sequence moving the cursor to a screen position,
+    where (0, 0) is the top left corner.
+    '''
+    return "\x1b[" + str(row + 1) + ";" + str(col + 1) + "H"
+
+class BoardRenderer:
+    '''
+    Draw a game board, sending only the cells that changed since the
+    last frame.
+
+    The first frame clears the screen and draws a status line with the
+    board under it; later frames move the cursor to each changed cell
+    and rewrite it. The cursor is then left under the board, with the
+    rest of the screen cleared for the prompts. When the stream is not
+    an ANSI terminal every frame is printed in full, in the same format
+    as print_board.
+
+    Parameters:
+        stream (file): Where to draw; sys.stdout by default.
+        ansi (bool or None): Force cursor moves on or off; None checks
+            the stream with supports_ansi.
+
+    Examples:
+        >>> import io
+        >>> stream = io.StringIO()
+        >>> renderer = BoardRenderer(stream, ansi=True)
+        >>> renderer.draw([['?', '?'], ['?', '?']], "Start")
+        >>> stream.getvalue()
+        '\\x1b[2J\\x1b[HStart\\n? ?\\n? ?\\n\\x1b[4;1H\\x1b[J'
+        >>> stream = renderer.stream = io.StringIO()
+        >>> renderer.draw([['?', '1'], ['?', '?']], "Start")
+        >>> stream.getvalue()
+        '\\x1b[2;3H1\\x1b[4;1H\\x1b[J'
+
+        >>> BoardRenderer(ansi=False).draw([['1', '⚑']], "Plain")
+        Plain
+        1 ⚑
+    '''
+
+    def __init__(self, stream=None, ansi=None):
+        if stream is None:
+            stream = sys.stdout
+        if ansi is None:
+            ansi = supports_ansi(stream)
+        self.stream = stream
+        self.ansi = ansi
+        self.frame = None
+        self.status = None
+
+    def draw(self, board: list, status=None, changed=None):
+        '''
+        Draw a frame of the board.
+
+        Parameters:
+            board (2D list): The game board.
+            status (str or None): A line shown above the board.
+            changed (list or None): The (row, col) cells changed since
+                the last frame, if known; otherwise every cell is
+                compared with the last frame.
+
+        Returns:
+            None
+        '''
+        if not self.ansi:
+            if status is not None:
+                print(status, file=self.stream)
+            for row in board:
+                print(" ".join(row), file=self.stream)
+            return
+
+        parts = []
+        if self.frame is None or len(self.frame) != len(board) \
+                or len(self.frame[0]) != len(board[0]):
+            # Full redraw of the first frame or after a size change
+            self.frame = [list(row) for row in board]
+            parts.append(CLEAR_SCREEN)
+            parts.append((status or "") + "\n")
+            for row in self.frame:
+                parts.append(" ".join(row) + "\n")
+        else:
+            if status != self.status:
+                parts.append(cursor_to(0, 0) + "\x1b[2K" + (status or ""))
+            if changed is None:
+                changed = []
+                for r, row in enumerate(board):
+                    row = list(row)
+                    if row != self.frame[r]:
+                        changed.extend((r, c) for c in range(len(row))
+                                       if row[c] != self.frame[r][c])
+            for r, c in changed:
+                value = board[r][c]
+                if value != self.frame[r][c]:
+                    self.frame[r][c] = value
+                    parts.append(cursor_to(r + 1, 2 * c) + value)
+        self.status = status
+
+        # Leave the cursor under the board for the prompts
+        parts.append(cursor_to(len(self.frame) + 1, 0) + CLEAR_BELOW)
+        self.stream.write("".join(parts))
+        self.stream.flush()
+
+
+# 12: Saving games
+
+# Layout of a saved game: the header, then the helper board packed two
+# cells per byte (4 bit codes), then the state of every game board cell
+# packed four cells per byte (2 bits: hidden, flagged or revealed).
+# The header holds the magic, version, flags, rows, cols, mines and an
+# unsigned 64 bit seed, which is only set if the SAVE_HAS_SEED flag is.
+SAVE_MAGIC = b"MSWP"
+SAVE_VERSION = 1
+SAVE_HEADER = struct.Struct("<4sHHIIIQ")
+SAVE_HAS_SEED = 1
+STATE_HIDDEN = 0
+STATE_FLAGGED = 1
+STATE_REVEALED = 2
+
+# Translation tables used to pack and unpack the bit fields
+GAME_STATES = bytes([STATE_REVEALED] * 10 + [STATE_HIDDEN, STATE_FLAGGED] +
+                    [0] * 244)
+SHIFTED = [bytes((i << shift) & 0xFF for i in range(256))
+           for shift in range(8)]
+NIBBLES = [bytes(i & 0x0F for i in range(256)),
+           bytes(i >> 4 for i in range(256))]
+STATE_FIELDS = [bytes((i >> shift) & 0x03 for i in range(256))
+                for shift in (0, 2, 4, 6)]
+# Indexed by state * 16 + helper code, gives the game board code
+GAME_CODES = bytes([HIDDEN_CODE] * 16 + [FLAG_CODE] * 16 + list(range(16)) +
+                   [0] * 208)
+
+def pack_fields(codes: bytes, per_byte: int):
+    '''
+    Pack small codes into bytes, per_byte codes (2 or 4) to a byte,
+    the first code in the lowest bits.
+
+    Examples:
+        >>> list(pack_fields(bytes([1, 2, 3]), 2))
+        [33, 3]
+    '''
+    width = 8 // per_byte
+    padding = -len(codes) % per_byte
+    codes = bytes(codes) + bytes(padding)
+    packed = codes[0::per_byte]
+    for i in range(1, per_byte):
+        packed = bytes(map(operator.or_, packed,
+                           codes[i::per_byte].translate(SHIFTED[i * width])))
+    return packed
+
+def unpack_fields(packed: bytes, per_byte: int, count: int):
+    '''
+    Undo pack_fields, giving back the first count codes.
+
+    Examples:
+        >>> list(unpack_fields(bytes([33, 3]), 2, 3))
+        [1, 2, 3]
+    '''
+    tables = NIBBLES if per_byte == 2 else STATE_FIELDS
+    codes = bytearray(len(packed) * per_byte)
+    for i in range(per_byte):
+        codes[i::per_byte] = packed.translate(tables[i])
+    return codes[:count]
+
+def save_game(path: str, helper_board: list, game_board: list,
+              nb_mines=None, seed=None):
+    '''
+    Save a game to a binary file using 6 bits per cell.
+
+    Parameters:
+        path (str): The file to write.
+        helper_board (2D list or Board): Board with mine data.
+        game_board (2D list or Board): Player's visible board.
+        nb_mines (int or None): Number of mines, counted if None.
+        seed (int or None): Seed the board was generated from, if any;
+            from 0 to 2 ** 64 - 1, like the seeds of getrandbits(64).
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the seed does not fit in 64 bits.
+    '''
+    if not isinstance(helper_board, Board):
+        helper_board = Board.from_list(helper_board)
+    if not isinstance(game_board, Board):
+        game_board = Board.from_list(game_board)
+    if nb_mines is None:
+        nb_mines = count_total(helper_board, -1)
+    flags = 0
+    if seed is None:
+        seed = 0
+    elif 0 <= seed < 2 ** 64:
+        flags |= SAVE_HAS_SEED
+    else:
+        raise ValueError("The seed must be from 0 to 2 ** 64 - 1.")
+
+    header = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, flags,
+                              helper_board.nb_rows, helper_board.nb_cols,
+                              nb_mines, seed)
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(pack_fields(helper_board.cells, 2))
+        file.write(pack_fields(game_board.cells.translate(GAME_STATES), 4))
+
+def read_save_header(data):
+    '''
+    Read and check the header of a saved game, and check that the
+    data is long enough for its boards.
+
+    Parameters:
+        data (bytes or mmap): The whole saved file.
+
+    Returns:
+        dict: 'rows', 'cols', 'mines' and 'seed' (None if not seeded).
+
+    Raises:
+        ValueError: If the data is not a saved game or is cut short.
+
+    Examples:
+        >>> read_save_header(b"MSWP")
+        Traceback (most recent call last):
+        ValueError: Not a saved Minesweeper game.
+    '''
+    if len(data) < SAVE_HEADER.size:
+        raise ValueError("Not a saved Minesweeper game.")
+    magic, version, flags, nb_rows, nb_cols, nb_mines, seed = \
+        SAVE_HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION:
+        raise ValueError("Not a saved Minesweeper game.")
+
+    nb_cells = nb_rows * nb_cols
+    if len(data) < SAVE_HEADER.size + (nb_cells + 1) // 2 + \
+            (nb_cells + 3) // 4:
+        raise ValueError("The saved game is cut short.")
+    return {'rows': nb_rows, 'cols': nb_cols, 'mines': nb_mines,
+            'seed': seed if flags & SAVE_HAS_SEED else None}
+
+def load_game(path: str):
+    '''
+    Load a game saved with save_game.
+
+    Parameters:
+        path (str): The file to read.
+
+    Returns:
+        tuple: (helper_board, game_board, info) where both boards are
+        Boards and info is the header as given by read_save_header.
+
+    Examples:
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "game.msw")
+        >>> save_game(path, [[0, 1], [1, -1]], [['0', '1'], ['?', '⚑']],
+        ...           seed=7)
+        >>> helper_board, game_board, info = load_game(path)
+        >>> helper_board.to_list(), game_board.to_list()
+        ([[0, 1], [1, -1]], [['0', '1'], ['?', '⚑']])
+        >>> info
+        {'rows': 2, 'cols': 2, 'mines': 1, 'seed': 7}
+        >>> save_game(path, [[0]], [['?']], seed=2 ** 63 + 5)
+        >>> load_game(path)[2]['seed'] == 2 ** 63 + 5
+        True
+    '''
+    with open(path, "rb") as file:
+        data = file.read()
+    info = read_save_header(data)
+    nb_cells = info['rows'] * info['cols']
+    helper_start = SAVE_HEADER.size
+    state_start = helper_start + (nb_cells + 1) // 2
+
+    helper_board = Board(info['rows'], info['cols'], 0)
+    helper_board.cells = unpack_fields(data[helper_start:state_start],
+                                       2, nb_cells)
+    states = unpack_fields(data[state_start:], 4, nb_cells)
+    game_board = Board(info['rows'], info['cols'], HIDDEN_SYMBOL)
+    game_board.cells = bytearray(bytes(map(
+        operator.or_, states.translate(SHIFTED[4]),
+        helper_board.cells)).translate(GAME_CODES))
+    return helper_board, game_board, info
+
+class SavedGame:
+    '''
+    A saved game opened with mmap, so that single cells can be read
+    without loading the boards.
+
+    Parameters:
+        path (str): The file written by save_game.
+
+    Examples:
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "game.msw")
+        >>> save_game(path, [[0, 1], [1, -1]], [['0', '1'], ['?', '⚑']])
+        >>> with SavedGame(path) as saved:
+        ...     saved.helper_value(1, 1), saved.game_value(1, 1)
+        (-1, '⚑')
+    '''
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.info = read_save_header(self.data)
+        self.nb_rows = self.info['rows']
+        self.nb_cols = self.info['cols']
+        self.helper_start = SAVE_HEADER.size
+        self.state_start = self.helper_start + \
+            (self.nb_rows * self.nb_cols + 1) // 2
+
+    def helper_code(self, row: int, col: int):
+        '''
+        Return the code of a cell of the helper board.
+        '''
+        index = row * self.nb_cols + col
+        return NIBBLES[index % 2][self.data[self.helper_start + index // 2]]
+
+    def helper_value(self, row: int, col: int):
+        '''
+        Return the value of a cell of the helper board.
+        '''
+        return HELPER_VALUES[self.helper_code(row, col)]
+
+    def game_value(self, row: int, col: int):
+        '''
+        Return the value of a cell of the game board.
+        '''
+        index = row * self.nb_cols + col
+        state = STATE_FIELDS[index % 4][self.data[self.state_start +
+                                                  index // 4]]
+        return GAME_VALUES[GAME_CODES[state * 16 +
+                                      self.helper_code(row, col)]]
+
+    def close(self):
+        '''
+        Release the memory map.
+        '''
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# 13: Chunked boards
+
+class ChunkedView:
+    '''
+    One side (helper or game) of a ChunkedBoard, indexed with
+    view[row][col] like a 2D list.
+    '''
+
+    def __init__(self, board, is_helper: bool):
+        self.board = board
+        self.is_helper = is_helper
+
+    def __len__(self):
+        return self.board.nb_rows
+
+    def __getitem__(self, row: int):
+        if not 0 <= row < self.board.nb_rows:
+            raise IndexError("row index out of range")
+        return ChunkedRow(self, row)
+
+    def get(self, row: int, col: int):
+        '''
+        Return the value of a cell.
+        '''
+        if self.is_helper:
+            return HELPER_VALUES[self.board.helper_code(row, col)]
+        return GAME_VALUES[self.board.game_code(row, col)]
+
+class ChunkedRow:
+    '''
+    A view of one row of a ChunkedView.
+    '''
+
+    def __init__(self, view: ChunkedView, row: int):
+        self.view = view
+        self.row = row
+
+    def __len__(self):
+        return self.view.board.nb_cols
+
+    def __getitem__(self, col: int):
+        if not 0 <= col < self.view.board.nb_cols:
+            raise IndexError("column index out of range")
+        return self.view.get(self.row, col)
+
+    def __setitem__(self, col: int, value):
+        if self.view.is_helper:
+            raise TypeError("the helper board of a ChunkedBoard is read-only")
+        if not 0 <= col < self.view.board.nb_cols:
+            raise IndexError("column index out of range")
+        self.view.board.set_game_code(self.row, col, CELL_CODES[value])
+
+class ChunkedBoard:
+    '''
+    A board too large to allocate, split in square chunks that only
+    exist once they are used.
+
+    The mines of a chunk are drawn from a seed derived from the board
+    seed and the chunk position, so any chunk can be generated again at
+    any time. Helper counts near a chunk border look at the mines of
+    the neighbouring chunks, so they agree across borders. Game chunks
+    are created when a cell is first revealed or flagged; when more
+    than max_chunks are loaded, the least recently used one is written
+    to spill_dir and read back when it is used again.
+
+    The helper and game attributes are indexed with [row][col] like the
+    2D lists, so reveal, flag, solve_cell and the other cell functions
+    work on them. Functions that walk the whole board (count_total,
+    GameState, print_board) do not. reveal_cascade goes through the
+    board's own reveal_cascade, which stops after cascade_cells cells:
+    an empty region of a board this large may never end.
+
+    A spill folder made by the board is deleted by close, or when the
+    board is garbage collected; the board can not be used after that.
+
+    Parameters:
+        seed (int): Seed of the board.
+        density (float): Share of the cells of each chunk holding a mine.
+        nb_rows (int): Number of rows; very large by default.
+        nb_cols (int): Number of columns; very large by default.
+        chunk_size (int): Side of a chunk.
+        max_chunks (int): Game chunks kept in memory.
+        spill_dir (str or None): Folder for evicted chunks; a temporary
+            folder is made on the first eviction if None.
+        cascade_cells (int): Cells one reveal_cascade may reveal.
+
+    Examples:
+        >>> board = ChunkedBoard(seed=202, density=0.2, chunk_size=8)
+        >>> helper_board, game_board = board.helper, board.game
+        >>> reveal(helper_board, game_board, 10 ** 9, 10 ** 9)
+        >>> game_board[10 ** 9][10 ** 9] == str(helper_board[10 ** 9][10 ** 9])
+        True
+        >>> flag(game_board, 5, 7)
+        >>> game_board[5][7], game_board[5][8]
+        ('⚑', '?')
+        >>> sorted(board.game_chunks)
+        [(0, 0), (125000000, 125000000)]
+        >>> ChunkedBoard(seed=202, density=0.2, chunk_size=8).helper[7][7] \\
+        ...     == helper_board[7][7]
+        True
+    '''
+
+    def __init__(self, seed: int, density: float = EASY_PERCENT,
+                 nb_rows: int = CHUNKED_BOARD_SIZE,
+                 nb_cols: int = CHUNKED_BOARD_SIZE,
+                 chunk_size: int = CHUNK_SIZE,
+                 max_chunks: int = MAX_LOADED_CHUNKS, spill_dir=None,
+                 cascade_cells: int = CHUNKED_CASCADE_CELLS):
+        self.seed = seed
+        self.density = density
+        self.nb_rows = nb_rows
+        self.nb_cols = nb_cols
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.spill_dir = spill_dir
+        self.spilled = set()
+        # Deletes the spill folder if the board made it
+        self.remove_spill_dir = None
+        self.cascade_cells = cascade_cells
+        # Revealed zero cells whose neighbours a cascade left hidden
+        self.pending = []
+
+        # Mines and helper codes can always be generated again, so they
+        # are only cached; game chunks hold the moves of the player
+        self.mine_chunks = collections.OrderedDict()
+        self.helper_chunks = collections.OrderedDict()
+        self.game_chunks = collections.OrderedDict()
+
+        self.helper = ChunkedView(self, True)
+        self.game = ChunkedView(self, False)
+
+    def chunk_seed(self, chunk_row: int, chunk_col: int):
+        '''
+        Return the seed of a chunk, derived from the board seed.
+        '''
+        return ((self.seed * 0x9E3779B1 + chunk_row) * 0x85EBCA77 +
+                chunk_col) * 0xC2B2AE3D
+
+    def remember(self, chunks, key: tuple, value):
+        '''
+        Store a generated chunk in an LRU cache of max_chunks entries.
+        '''
+        chunks[key] = value
+        if len(chunks) > self.max_chunks:
+            chunks.popitem(last=False)
+        return value
+
+    def chunk_mines(self, chunk_row: int, chunk_col: int):
+        '''
+        Return the mines (1 for a mine) of a chunk, row by row. Chunks
+        outside the board have no mines.
+        '''
+        key = (chunk_row, chunk_col)
+        mines = self.mine_chunks.get(key)
+        if mines is not None:
+            self.mine_chunks.move_to_end(key)
+            return mines
+
+        size = self.chunk_size
+        mines = bytearray(size * size)
+        first_row = chunk_row * size
+        first_col = chunk_col * size
+        if 0 <= first_row < self.nb_rows and 0 <= first_col < self.nb_cols:
+            # Chunks on the last row or column may be cut by the edge
+            nb_rows = min(size, self.nb_rows - first_row)
+            nb_cols = min(size, self.nb_cols - first_col)
+            rng = random.Random(self.chunk_seed(chunk_row, chunk_col))
+            nb_mines = round(self.density * nb_rows * nb_cols)
+            for index in rng.sample(range(nb_rows * nb_cols), nb_mines):
+                mines[index // nb_cols * size + index % nb_cols] = 1
+        return self.remember(self.mine_chunks, key, mines)
+
+    def helper_chunk(self, chunk_row: int, chunk_col: int):
+        '''
+        Return the helper codes of a chunk, row by row.
+        '''
+        key = (chunk_row, chunk_col)
+        codes = self.helper_chunks.get(key)
+        if codes is not None:
+            self.helper_chunks.move_to_end(key)
+            return codes
+
+        # The chunk's mines with a border taken from its neighbours
+        size = self.chunk_size
+        above = [self.chunk_mines(chunk_row - 1, chunk_col + dc)
+                 for dc in (-1, 0, 1)]
+        middle = [self.chunk_mines(chunk_row, chunk_col + dc)
+                  for dc in (-1, 0, 1)]
+        below = [self.chunk_mines(chunk_row + 1, chunk_col + dc)
+                 for dc in (-1, 0, 1)]
+        padded = bytearray()
+        for chunks, r in ((above, size - 1),) + \
+                tuple((middle, r) for r in range(size)) + ((below, 0),):
+            start = r * size
+            padded.append(chunks[0][start + size - 1])
+            padded += chunks[1][start:start + size]
+            padded.append(chunks[2][start])
+
+        codes = padded_mine_codes(padded, size, size)
+        return self.remember(self.helper_chunks, key, codes)
+
+    def game_chunk(self, chunk_row: int, chunk_col: int, create: bool):
+        '''
+        Return the game codes of a chunk, reading it back from the spill
+        folder if it was evicted. A chunk that was never played is None
+        unless create is True.
+        '''
+        key = (chunk_row, chunk_col)
+        codes = self.game_chunks.get(key)
+        if codes is not None:
+            self.game_chunks.move_to_end(key)
+            return codes
+
+        if key in self.spilled:
+            with open(self.spill_path(key), "rb") as file:
+                codes = bytearray(file.read())
+        elif create:
+            codes = bytearray([HIDDEN_CODE]) * (self.chunk_size ** 2)
+        else:
+            return None
+
+        self.game_chunks[key] = codes
+        if len(self.game_chunks) > self.max_chunks:
+            self.spill(*self.game_chunks.popitem(last=False))
+        return codes
+
+    def spill_path(self, key: tuple):
+        '''
+        Return the file an evicted game chunk is written to.
+        '''
+        return os.path.join(self.spill_dir,
+                            str(key[0]) + "_" + str(key[1]) + ".chunk")
+
+    def spill(self, key: tuple, codes: bytearray):
+        '''
+        Write an evicted game chunk to the spill folder.
+        '''
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="minesweeper-")
+            self.remove_spill_dir = weakref.finalize(
+                self, shutil.rmtree, self.spill_dir, True)
+        with open(self.spill_path(key), "wb") as file:
+            file.write(codes)
+        self.spilled.add(key)
+
+    def helper_code(self, row: int, col: int):
+        '''
+        Return the helper code of a cell.
+        '''
+        chunk_row, r = divmod(row, self.chunk_size)
+        chunk_col, c = divmod(col, self.chunk_size)
+        return self.helper_chunk(chunk_row, chunk_col)[r * self.chunk_size
+                                                       + c]
+
+    def game_code(self, row: int, col: int):
+        '''
+        Return the game code of a cell.
+        '''
+        chunk_row, r = divmod(row, self.chunk_size)
+        chunk_col, c = divmod(col, self.chunk_size)
+        codes = self.game_chunk(chunk_row, chunk_col, False)
+        if codes is None:
+            return HIDDEN_CODE
+        return codes[r * self.chunk_size + c]
+
+    def set_game_code(self, row: int, col: int, code: int):
+        '''
+        Store the game code of a cell, creating its chunk if needed.
+        '''
+        chunk_row, r = divmod(row, self.chunk_size)
+        chunk_col, c = divmod(col, self.chunk_size)
+        self.game_chunk(chunk_row, chunk_col, True)[r * self.chunk_size
+                                                    + c] = code
+
+    def reveal_cascade(self, row: int, col: int):
+        '''
+        Reveal a cell like reveal_cascade, but stop once cascade_cells
+        cells are revealed. The zero cells whose neighbours are still
+        hidden are kept in pending, and expand opens more of them.
+
+        Returns:
+            list[tuple[int, int]]: The (row, col) of every revealed cell,
+            starting with the chosen one.
+
+        Examples:
+            >>> board = ChunkedBoard(seed=1, density=0.03, cascade_cells=50)
+            >>> changed = board.reveal_cascade(0, 0)
+            >>> len(changed) < 60, len(board.pending) > 0
+            (True, True)
+            >>> len(board.expand()) < 60
+            True
+        '''
+        reveal(self.helper, self.game, row, col)
+        if self.helper_code(row, col) == 0:
+            self.pending.append((row, col))
+            return [(row, col)] + self.expand()
+        return [(row, col)]
+
+    def expand(self, max_cells=None):
+        '''
+        Open the neighbours of pending zero cells, revealing at most
+        about max_cells cells (cascade_cells if None).
+
+        Returns:
+            list[tuple[int, int]]: The (row, col) of every revealed cell.
+        '''
+        if max_cells is None:
+            max_cells = self.cascade_cells
+        changed = []
+        stack = self.pending
+        while stack and len(changed) < max_cells:
+            r, c = stack.pop()
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if not (0 <= r + dr < self.nb_rows and
+                            0 <= c + dc < self.nb_cols):
+                        continue
+                    if self.game_code(r + dr, c + dc) == HIDDEN_CODE:
+                        # Neighbours of a zero are never mines
+                        code = self.helper_code(r + dr, c + dc)
+                        self.set_game_code(r + dr, c + dc, code)
+                        changed.append((r + dr, c + dc))
+                        if code == 0:
+                            stack.append((r + dr, c + dc))
+        return changed
+
+    def close(self):
+        '''
+        Delete the spill folder if the board made it.
+        '''
+        if self.remove_spill_dir is not None:
+            self.remove_spill_dir()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# 14: Solver statistics
+
+# Upper bounds (in milliseconds) of the sweep time histogram buckets
+SWEEP_BUCKETS_MS = (0.1, 1, 10, 100, 1000)
+
+class SolverStats:
+    '''
+    Counts and timings of a solver run, collected when an instance is
+    passed as the stats argument of solve, solve_frontier, deduce or
+    solve_constraints. Without it the solvers only pay for a few
+    "is None" checks.
+
+    Attributes:
+        counters (dict): Event name (clicks, sweeps, solve_cell calls,
+            deduce rounds, constraints built) to count.
+        deductions (dict): Rule name to number of cells it settled.
+            The two rules of solve_cell are solve_cell_reveal and
+            solve_cell_flag; cells revealed by a cascade are not
+            deductions and are counted as cascade_cells instead.
+        phase_seconds (dict): Phase name to total seconds spent in it.
+        sweep_histogram (list): Number of sweeps of solve per bucket of
+            SWEEP_BUCKETS_MS, the last one for slower sweeps.
+
+    Examples:
+        >>> helper_board = [[0, 1, -1], [0, 1, 1], [0, 0, 0]]
+        >>> game_board = init_board(3, 3, HIDDEN_SYMBOL)
+        >>> reveal(helper_board, game_board, 0, 0)
+        >>> left = lambda r, c: reveal(helper_board, game_board, r, c)
+        >>> right = lambda r, c: flag(game_board, r, c)
+        >>> stats = SolverStats()
+        >>> solve_frontier(game_board, left, right, stats=stats)
+        'solved'
+        >>> stats.counters['left_clicks'], stats.counters['right_clicks']
+        (7, 1)
+        >>> stats.deductions
+        {'solve_cell_reveal': 7, 'solve_cell_flag': 1}
+        >>> sorted(json.loads(stats.to_json()))
+        ['counters', 'deductions', 'phase_seconds', 'sweep_histogram']
+    '''
+
+    def __init__(self):
+        self.counters = {}
+        self.deductions = {}
+        self.phase_seconds = {}
+        self.sweep_histogram = [0] * (len(SWEEP_BUCKETS_MS) + 1)
+
+    def count(self, name: str, amount: int = 1):
+        '''
+        Add amount to a counter.
+        '''
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, phase: str, seconds: float):
+        '''
+        Add time spent in a phase.
+        '''
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + \
+            seconds
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        '''
+        Time the body of a with statement as the given phase.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def record_sweep(self, seconds: float):
+        '''
+        Count one sweep over the board and file its time in the
+        histogram.
+        '''
+        self.count('sweeps')
+        self.add_time('sweeps', seconds)
+        milliseconds = seconds * 1000
+        bucket = 0
+        while bucket < len(SWEEP_BUCKETS_MS) and \
+                milliseconds > SWEEP_BUCKETS_MS[bucket]:
+            bucket += 1
+        self.sweep_histogram[bucket] += 1
+
+    def record_deductions(self, rule: str, amount: int):
+        '''
+        Add cells settled by a rule.
+        '''
+        if amount:
+            self.deductions[rule] = self.deductions.get(rule, 0) + amount
+
+    def wrap_clicks(self, left_click, right_click):
+        '''
+        Return versions of the click callbacks that count every call.
+        Callbacks that already count into this instance are returned
+        as they are, so nested solvers do not count twice.
+
+        Returns:
+            tuple: The counting (left_click, right_click).
+        '''
+        if getattr(left_click, 'stats', None) is self:
+            return left_click, right_click
+
+        def counted_left_click(row, col):
+            self.count('left_clicks')
+            return left_click(row, col)
+
+        def counted_right_click(row, col):
+            self.count('right_clicks')
+            return right_click(row, col)
+
+        counted_left_click.stats = self
+        counted_right_click.stats = self
+        return counted_left_click, counted_right_click
+
+    def summary(self):
+        '''
+        Return every statistic in a dictionary of plain values.
+        '''
+        labels = ["<=" + str(bound) + "ms" for bound in SWEEP_BUCKETS_MS]
+        labels.append(">" + str(SWEEP_BUCKETS_MS[-1]) + "ms")
+        return {
+            'counters': dict(self.counters),
+            'deductions': dict(self.deductions),
+            'phase_seconds': dict(self.phase_seconds),
+            'sweep_histogram': dict(zip(labels, self.sweep_histogram)),
+        }
+
+    def to_json(self, indent=None):
+        '''
+        Return the summary as a JSON string.
+        '''
+        return json.dumps(self.summary(), indent=indent)
+
+
+# 15: Batched moves
+
+# Rules of solve_batched: the simple rules first, then the others
+BATCH_RULES = (single_cell_rule,) + CONSTRAINT_RULES
+
+def click_moves(left_click, right_click):
+    '''
+    Turn per-cell callbacks into an apply_moves callback for
+    solve_batched.
+
+    Parameters:
+        left_click (function): Called with (row, col) to reveal a cell.
+        right_click (function): Called with (row, col) to flag a cell.
+
+    Returns:
+        function: apply_moves(reveals, flags), clicking every cell.
+    '''
+    def apply_moves(reveals, flags):
+        for r, c in reveals:
+            left_click(r, c)
+        for r, c in flags:
+            right_click(r, c)
+    return apply_moves
+
+def solve_batched(board: list, apply_moves, rules=BATCH_RULES, stats=None):
+    '''
+    Run the bot, handing all the moves found in a pass to a single
+    apply_moves(reveals, flags) call instead of one callback per cell.
+
+    Each pass uses deduce on the whole frontier: the first rule that
+    finds anything gives the cells to reveal and to flag, as sorted
+    lists of (row, col). The bot stops when no hidden cell is left or
+    when a pass finds nothing or changes nothing.
+
+    Parameters:
+        board (2D list): The game board.
+        apply_moves (function): Called with (reveals, flags) once per
+            pass; click_moves adapts left_click and right_click.
+        rules (sequence): The rules to use, as for deduce.
+        stats (SolverStats or None): Collects counts and timings.
+
+    Returns:
+        str: SOLVED if no hidden cell is left, STUCK otherwise.
+
+    Examples:
+        >>> helper_board = [[0, 1, -1], [0, 1, 1], [0, 0, 0]]
+        >>> game_board = init_board(3, 3, HIDDEN_SYMBOL)
+        >>> reveal(helper_board, game_board, 0, 0)
+        >>> def apply_moves(reveals, flags):
+        ...     print(reveals, flags)
+        ...     for r, c in reveals:
+        ...         reveal(helper_board, game_board, r, c)
+        ...     for r, c in flags:
+        ...         flag(game_board, r, c)
+        >>> solve_batched(game_board, apply_moves)
+        [(0, 1), (1, 0), (1, 1)] []
+        [(2, 0), (2, 1)] []
+        [(1, 2), (2, 2)] []
+        [] [(0, 2)]
+        'solved'
+    '''
+    while count_total(board, HIDDEN_SYMBOL) > 0:
+        safe, mines = deduce(board, rules, stats)
+        reveals = sorted(safe)
+        flags = sorted(mines)
+        if not reveals and not flags:
+            return STUCK
+        if stats is not None:
+            stats.count('batches')
+            stats.count('left_clicks', len(reveals))
+            stats.count('right_clicks', len(flags))
+        apply_moves(reveals, flags)
+        if all(board[r][c] == HIDDEN_SYMBOL for r, c in reveals + flags):
+            return STUCK
+    return SOLVED
+
+
+# 16: Game server
+
+# Simultaneous connections opened by load_test, and connections the
+# server lets wait to be accepted
+LOAD_TEST_CONCURRENCY = 500
+SERVER_BACKLOG = 1024
+
+# Most cells a game of the server may have, so that no client can make
+# it build a board that takes seconds and gigabytes
+MAX_SERVER_CELLS = 100000
+
+class GameSession:
+    '''
+    One game of the server, driven by the lines of the protocol:
+
+        NEW <rows> <cols> <EASY|MEDIUM|HARD> [seed]  ->  OK <mines>
+        0 <row> <col>  (reveal, as in play)  ->  OK <cells revealed>,
+                                                  WON or LOST
+        1 <row> <col>  (flag, as in play)    ->  OK <mines remaining>
+        BOARD  ->  one line per row, then END
+        QUIT   ->  BYE
+
+    Anything else gets ERROR and a message, as does a NEW game of more
+    than MAX_SERVER_CELLS cells. After WON or LOST the board can still
+    be shown, but moves need a NEW game.
+
+    Examples:
+        >>> session = GameSession()
+        >>> session.handle("NEW 2 3 EASY 202")
+        ['OK 0']
+        >>> session.handle("1 0 0")
+        ['OK -1']
+        >>> session.handle("0 1 2")
+        ['WON']
+        >>> session.handle("BOARD")
+        ['⚑ 0 0', '0 0 0', 'END']
+        >>> session.handle("0 0 1")
+        ['ERROR no game in progress']
+        >>> session.handle("NEW 20000 20000 EASY")
+        ['ERROR board larger than 100000 cells']
+    '''
+
+    def __init__(self):
+        self.state = None
+        self.mines = 0
+        self.finished = True
+
+    def handle(self, line: str):
+        '''
+        Apply one line of the protocol.
+
+        Parameters:
+            line (str): The line sent by the client.
+
+        Returns:
+            list[str]: The lines to send back.
+        '''
+        words = line.split()
+        if not words:
+            return ["ERROR empty command"]
+        command = words[0].upper()
+        try:
+            if command == "NEW":
+                return self.new_game(words[1:])
+            if command == "QUIT":
+                return ["BYE"]
+            if command == "BOARD" and self.state is not None:
+                return [" ".join(row) for row in self.state.game_board] + \
+                    ["END"]
+            if command in ("0", "1", "BOARD") and self.finished:
+                return ["ERROR no game in progress"]
+            if command in ("0", "1") and len(words) == 3:
+                return self.move(command == "1", int(words[1]),
+                                 int(words[2]))
+        except (ValueError, KeyError, IndexError):
+            return ["ERROR invalid arguments"]
+        return ["ERROR unknown command"]
+
+    def new_game(self, words: list):
+        '''
+        Start a game from the arguments of NEW.
+        '''
+        nb_rows = int(words[0])
+        nb_cols = int(words[1])
+        if nb_rows < 1 or nb_cols < 1:
+            raise ValueError("empty board")
+        if nb_rows * nb_cols > MAX_SERVER_CELLS:
+            return ["ERROR board larger than " + str(MAX_SERVER_CELLS) +
+                    " cells"]
+        self.mines = int(DIFFICULTY_PERCENTS[words[2].upper()] *
+                         (nb_rows * nb_cols))
+        seed = int(words[3]) if len(words) > 3 else None
+        helper_board = generate_helper_board_fast(nb_rows, nb_cols,
+                                                  self.mines, seed)
+        game_board = Board(nb_rows, nb_cols, HIDDEN_SYMBOL)
+        self.state = GameState(helper_board, game_board)
+        self.finished = False
+        return ["OK " + str(self.mines)]
+
+    def move(self, is_flag: bool, row: int, col: int):
+        '''
+        Reveal or flag a cell of the current game.
+        '''
+        if not is_valid_position(self.state.game_board, row, col):
+            return ["ERROR position outside the board"]
+        if is_flag:
+            self.state.flag(row, col)
+            return ["OK " + str(self.mines - self.state.flagged)]
+        try:
+            changed = self.state.reveal_cascade(row, col)
+        except AssertionError:
+            self.finished = True
+            return ["LOST"]
+        if self.state.won():
+            self.finished = True
+            return ["WON"]
+        return ["OK " + str(len(changed))]
+
+async def handle_connection(reader, writer):
+    '''
+    Run one GameSession for a client connection until QUIT or until
+    the client hangs up. A NEW game is built in a worker thread, so
+    that the other sessions keep playing meanwhile.
+    '''
+    session = GameSession()
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            line = line.decode("utf-8", "replace")
+            if line.lstrip()[:3].upper() == "NEW":
+                replies = await loop.run_in_executor(None, session.handle,
+                                                     line)
+            else:
+                replies = session.handle(line)
+            writer.write(("\n".join(replies) + "\n").encode("utf-8"))
+            await writer.drain()
+            if replies == ["BYE"]:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def start_game_server(host: str = "127.0.0.1", port: int = 0,
+                            path=None):
+    '''
+    Start the game server on a TCP port, or on a Unix socket if a path
+    is given. Every connection plays its own games.
+
+    Parameters:
+        host (str): Address to listen on.
+        port (int): TCP port; 0 picks a free one.
+        path (str or None): Unix socket path, used instead of TCP.
+
+    Returns:
+        asyncio.Server: The running server.
+    '''
+    if path is not None:
+        return await asyncio.start_unix_server(handle_connection, path,
+                                               backlog=SERVER_BACKLOG)
+    return await asyncio.start_server(handle_connection, host, port,
+                                      backlog=SERVER_BACKLOG)
+
+def serve_games(host: str = "127.0.0.1", port: int = 2020, path=None):
+    '''
+    Run the game server until interrupted.
+    '''
+    async def run():
+        server = await start_game_server(host, port, path)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(run())
+
+def percentile(values: list, fraction: float):
+    '''
+    Return the value below which the given fraction of a sorted list
+    falls (nearest rank).
+
+    Examples:
+        >>> percentile([1, 2, 3, 4], 0.5)
+        2
+        >>> percentile([1, 2, 3, 4], 0.99)
+        4
+    '''
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+async def load_test(nb_sessions: int, moves_per_session: int,
+                    host: str = "127.0.0.1", port: int = 2020, path=None,
+                    nb_rows: int = 16, nb_cols: int = 16,
+                    difficulty: str = "EASY", seed: int = 0,
+                    concurrency: int = LOAD_TEST_CONCURRENCY):
+    '''
+    Play many sessions against a game server at once and measure it.
+
+    Every session opens its own connection, starts a seeded game and
+    reveals random cells, starting a new game after a win or a loss.
+
+    Parameters:
+        nb_sessions (int): Number of sessions.
+        moves_per_session (int): Reveals sent by each session.
+        host (str): Server address.
+        port (int): Server TCP port.
+        path (str or None): Server Unix socket path, used instead of TCP.
+        nb_rows (int): Number of rows of each game.
+        nb_cols (int): Number of columns of each game.
+        difficulty (str): One of EASY, MEDIUM or HARD.
+        seed (int): Base seed of the games and moves.
+        concurrency (int): Connections open at the same time.
+
+    Returns:
+        dict: Sessions, moves, seconds, moves per second and the move
+        latency percentiles in milliseconds.
+
+    Examples:
+        >>> async def demo():
+        ...     server = await start_game_server()
+        ...     port = server.sockets[0].getsockname()[1]
+        ...     async with server:
+        ...         return await load_test(20, 5, port=port)
+        >>> report = asyncio.run(demo())
+        >>> report['sessions'], report['moves']
+        (20, 100)
+    '''
+    latencies = []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def play_session(number):
+        rng = random.Random(seed * 1000003 + number)
+        async with limit:
+            if path is not None:
+                reader, writer = await asyncio.open_unix_connection(path)
+            else:
+                reader, writer = await asyncio.open_connection(host, port)
+
+            async def send(line):
+                writer.write((line + "\n").encode("utf-8"))
+                await writer.drain()
+                return (await reader.readline()).decode("utf-8").strip()
+
+            new_game = "NEW " + str(nb_rows) + " " + str(nb_cols) + " " + \
+                difficulty + " "
+            await send(new_game + str(rng.getrandbits(32)))
+            for i in range(moves_per_session):
+                move = "0 " + str(rng.randrange(nb_rows)) + " " + \
+                    str(rng.randrange(nb_cols))
+                start = time.perf_counter()
+                reply = await send(move)
+                latencies.append(time.perf_counter() - start)
+                if reply in ("WON", "LOST"):
+                    await send(new_game + str(rng.getrandbits(32)))
+            await send("QUIT")
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play_session(i) for i in range(nb_sessions)))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'sessions': nb_sessions,
+        'moves': len(latencies),
+        'seconds': seconds,
+        'moves_per_second': len(latencies) / seconds if seconds else 0.0,
+        'latency_ms': {name: percentile(latencies, fraction) * 1000
+                       for name, fraction in (('p50', 0.50), ('p90', 0.90),
+                                              ('p99', 0.99), ('max', 1.0))},
+    }
+
+
+# 17: Mine probabilities
+
+def convolve(first: dict, second: dict):
+    '''
+    Combine two {mines: number of layouts} counts of independent parts
+    into the count for both parts together.
+
+    Examples:
+        >>> convolve({0: 1, 1: 2}, {1: 3})
+        {1: 3, 2: 6}
+    '''
+    combined = {}
+    for mines_a, count_a in first.items():
+        for mines_b, count_b in second.items():
+            combined[mines_a + mines_b] = combined.get(mines_a + mines_b,
+                                                       0) + count_a * count_b
+    return combined
+
+def layout_order(constraints: list):
+    '''
+    Order the hidden cells of a group so that linked cells come close
+    together (breadth-first from a cell at one end of the group), which
+    keeps few constraints half-filled at any time in count_layouts.
+
+    Examples:
+        >>> a = (frozenset({(0, 0), (0, 1)}), 1)
+        >>> b = (frozenset({(0, 1), (0, 2)}), 1)
+        >>> layout_order([b, a])
+        [(0, 2), (0, 1), (0, 0)]
+    '''
+    linked = {}
+    for cells, count in constraints:
+        for cell in cells:
+            linked.setdefault(cell, set()).update(cells)
+
+    def breadth_first(first):
+        order = [first]
+        seen = {first}
+        for cell in order:
+            for other in sorted(linked[cell] - seen):
+                seen.add(other)
+                order.append(other)
+        return order
+
+    # The last cell reached from any cell is near an end of the group
+    return breadth_first(breadth_first(min(linked))[-1])
+
+def layout_states(constraints: list, cells: list, max_entries: int):
+    '''
+    Count partial layouts of a group, deciding the cells in the given
+    order; used by count_layouts.
+
+    Partial layouts that leave the same number of mines needed by every
+    constraint still open are merged into one state, so the work grows
+    with the number of states instead of doubling with every cell.
+
+    Returns:
+        list or None: For each number i of decided cells, a dict mapping
+        a state (sorted (constraint, mines still needed) pairs of the
+        open constraints) to {mines placed: number of partial layouts}.
+        None if a step needed more than max_entries entries.
+    '''
+    position = {cell: i for i, cell in enumerate(cells)}
+    links = [[] for cell in cells]
+    last = []
+    for k, (con_cells, count) in enumerate(constraints):
+        indices = sorted(position[cell] for cell in con_cells)
+        last.append(indices[-1])
+        for after, i in enumerate(reversed(indices)):
+            # after: cells of the constraint decided after cell i
+            links[i].append((k, after))
+
+    steps = [{(): {0: 1}}]
+    for i in range(len(cells)):
+        new_states = {}
+        for state, counts in steps[-1].items():
+            for value in (0, 1):
+                needed = dict(state)
+                for k, after in links[i]:
+                    left = needed.get(k, constraints[k][1]) - value
+                    if not 0 <= left <= after:
+                        break
+                    needed[k] = left
+                else:
+                    new_state = tuple(sorted((k, left) for k, left
+                                             in needed.items()
+                                             if last[k] != i))
+                    target = new_states.setdefault(new_state, {})
+                    for mines, ways in counts.items():
+                        target[mines + value] = target.get(mines + value,
+                                                           0) + ways
+        if sum(map(len, new_states.values())) > max_entries:
+            return None
+        steps.append(new_states)
+    return steps
+
+def count_layouts(constraints: list, max_entries: int = MAX_LAYOUT_STATES):
+    '''
+    Count the valid mine layouts of a group of constraints of any size,
+    with the same result as enumerate_component.
+
+    The partial layouts are counted by layout_states both ways along
+    layout_order. A cell holds a mine in the layouts that join a state
+    before it, the mine, and a state after it that needs exactly the
+    remaining mines of every open constraint.
+
+    Parameters:
+        constraints (list): One group from split_components.
+        max_entries (int): Largest number of (state, mines) entries
+            kept for one step.
+
+    Returns:
+        tuple or None: (cells, layouts) as given by enumerate_component
+        (cells in layout_order), or None if a step needed more than
+        max_entries entries.
+
+    Examples:
+        >>> a = (frozenset({(0, 0), (0, 1)}), 1)
+        >>> b = (frozenset({(0, 1), (0, 2)}), 1)
+        >>> count_layouts([a, b])
+        ([(0, 2), (0, 1), (0, 0)], {1: [1, [0, 1, 0]], 2: [1, [1, 0, 1]]})
+        >>> count_layouts([a, b], max_entries=1) is None
+        True
+    '''
+    cells = layout_order(constraints)
+    nb_cells = len(cells)
+    forward = layout_states(constraints, cells, max_entries)
+    if forward is None:
+        return None
+    backward = layout_states(constraints, cells[::-1], max_entries)
+    if backward is None:
+        return None
+
+    position = {cell: i for i, cell in enumerate(cells)}
+    links = [[] for cell in cells]
+    last = {}
+    for k, (con_cells, count) in enumerate(constraints):
+        indices = sorted(position[cell] for cell in con_cells)
+        last[k] = indices[-1]
+        for i in indices:
+            links[i].append(k)
+
+    layouts = {mines: [ways, [0] * nb_cells]
+               for mines, ways in forward[-1].get((), {}).items()}
+    for i in range(nb_cells):
+        # States after cell i, counted from the end of the order
+        after = backward[nb_cells - 1 - i]
+        for state, counts in forward[i].items():
+            needed = dict(state)
+            for k in links[i]:
+                needed[k] = needed.get(k, constraints[k][1]) - 1
+            if any(left < 0 for left in needed.values()) or \
+                    any(left != 0 for k, left in needed.items()
+                        if last[k] == i):
+                continue
+            # The cells after i must hold what is still needed
+            match = tuple(sorted((k, constraints[k][1] - left)
+                                 for k, left in needed.items()
+                                 if last[k] != i))
+            rest = after.get(match)
+            if not rest:
+                continue
+            for mines, ways in counts.items():
+                for rest_mines, rest_ways in rest.items():
+                    layouts[mines + 1 + rest_mines][1][i] += \
+                        ways * rest_ways
+    return cells, layouts
+
+def mine_probabilities(board: list, nb_mines: int):
+    '''
+    Compute the chance that each cell of a board holds a mine.
+
+    Cells that subset_rule proves safe or mined are set first, and the
+    rest of the hidden frontier is split into independent groups whose
+    valid layouts are counted: by component_layouts (cached by shape)
+    up to MAX_ENUMERATION_CELLS cells, and by count_layouts above that.
+    The groups are then combined with the hidden cells away from the
+    frontier so that the total matches the number of mines, giving
+    every layout of the whole board the same weight. Flags are trusted
+    as mines.
+
+    The result is exact unless a group needs more than MAX_LAYOUT_STATES
+    entries for a cell in count_layouts. Such a group is counted as if
+    it were away from the frontier, and its cells are returned as
+    approximate (the other cells then ignore its constraints too).
+
+    Parameters:
+        board (2D list): The game board.
+        nb_mines (int): Number of mines on the board.
+
+    Returns:
+        tuple: (probabilities, approximate), where probabilities is a
+        2D list giving the chance of a mine in each cell (0.0 for
+        revealed cells and 1.0 for flagged ones), and approximate is
+        the set of (row, col) cells whose chance is not exact.
+
+    Raises:
+        ValueError: If no layout fits the board and the mine count.
+
+    Examples:
+        >>> board = [['1', '?'], ['?', '?']]
+        >>> mine_probabilities(board, 1)[0]
+        [[0.0, 0.3333333333333333], [0.3333333333333333, 0.3333333333333333]]
+        >>> board = [['1', '1', '?'], ['?', '?', '?']]
+        >>> mine_probabilities(board, 1)
+        ([[0.0, 0.0, 0.0], [0.5, 0.5, 0.0]], set())
+    '''
+    nb_rows = len(board)
+    nb_cols = len(board[0])
+    constraints = frontier_constraints(board)
+    mines_left = nb_mines - count_total(board, FLAG_SYMBOL)
+
+    # Cells that are certain take no part in the counting
+    safe_cells, mined_cells = subset_rule(constraints)
+    mines_left -= len(mined_cells)
+    constraints = list({(cells - safe_cells - mined_cells,
+                         count - len(cells & mined_cells))
+                        for cells, count in constraints
+                        if cells - safe_cells - mined_cells})
+
+    groups = []
+    frontier = set()
+    approximate = set()
+    for group in split_components(constraints):
+        group_cells = set().union(*(cells for cells, count in group))
+        if len(group_cells) <= MAX_ENUMERATION_CELLS:
+            result = component_layouts(group)
+        else:
+            result = count_layouts(group)
+        if result is None:
+            approximate |= group_cells
+        else:
+            groups.append(result)
+            frontier.update(result[0])
+    outside = count_total(board, HIDDEN_SYMBOL) - len(frontier) - \
+        len(safe_cells) - len(mined_cells)
+
+    # Ways to place m mines on the cells away from the frontier, for
+    # every m that can be asked for
+    outside_ways = [1]
+    for m in range(min(outside, max(mines_left, 0))):
+        outside_ways.append(outside_ways[-1] * (outside - m) // (m + 1))
+
+    # Layout counts of all groups but one, from prefix and suffix
+    # products, weighted by the ways to place the other mines outside
+    counts = [{mines: entry[0] for mines, entry in layouts.items()}
+              for cells, layouts in groups]
+    prefixes = [{0: 1}]
+    for count in counts:
+        prefixes.append(convolve(prefixes[-1], count))
+    suffixes = [{0: 1}]
+    for count in reversed(counts):
+        suffixes.append(convolve(suffixes[-1], count))
+    suffixes.reverse()
+
+    total = sum(ways * outside_ways[mines_left - mines]
+                for mines, ways in prefixes[-1].items()
+                if 0 <= mines_left - mines <= outside)
+    if total == 0:
+        raise ValueError("No mine layout fits this board.")
+
+    probabilities = [[0.0] * nb_cols for r in range(nb_rows)]
+    for r in range(nb_rows):
+        for c in range(nb_cols):
+            if board[r][c] == FLAG_SYMBOL or (r, c) in mined_cells:
+                probabilities[r][c] = 1.0
+
+    for i, (cells, layouts) in enumerate(groups):
+        rest = convolve(prefixes[i], suffixes[i + 1])
+        cell_weights = [0] * len(cells)
+        for mines, (ways, cell_counts) in layouts.items():
+            weight = sum(rest_ways *
+                         outside_ways[mines_left - mines - rest_mines]
+                         for rest_mines, rest_ways in rest.items()
+                         if 0 <= mines_left - mines - rest_mines <= outside)
+            if weight:
+                for j, cell_count in enumerate(cell_counts):
+                    cell_weights[j] += cell_count * weight
+        for (r, c), weight in zip(cells, cell_weights):
+            probabilities[r][c] = weight / total
+
+    if outside:
+        outside_weight = sum(ways * math.comb(outside - 1,
+                                              mines_left - mines - 1)
+                             for mines, ways in prefixes[-1].items()
+                             if 1 <= mines_left - mines <= outside)
+        for r in range(nb_rows):
+            for c in range(nb_cols):
+                if board[r][c] == HIDDEN_SYMBOL and (r, c) not in frontier \
+                        and (r, c) not in safe_cells \
+                        and (r, c) not in mined_cells:
+                    probabilities[r][c] = outside_weight / total
+    return probabilities, approximate
+
+def safest_cell(board: list, probabilities: list):
+    '''
+    Return the hidden cell least likely to hold a mine, as (row, col),
+    or None if no cell is hidden.
+
+    Examples:
+        >>> safest_cell([['1', '?'], ['?', '?']], [[0.0, 0.5], [0.2, 0.3]])
+        (1, 0)
+    '''
+    best = None
+    for r, row in enumerate(probabilities):
+        for c, probability in enumerate(row):
+            if board[r][c] == HIDDEN_SYMBOL and \
+                    (best is None or probability < best[0]):
+                best = (probability, r, c)
+    if best is None:
+        return None
+    return best[1], best[2]
+
+
+# 18: Parallel solver
+
+def solve_group(group: list, rules=CONSTRAINT_RULES):
+    '''
+    Apply single_cell_rule and then the rules in order to one group of
+    constraints until none of them finds anything more; run in the
+    workers of solve_parallel.
+
+    The cells found are taken out of the constraints (a mine lowering
+    the count of each constraint it was part of) before the next
+    round, so the group is worked out as far as it can be without
+    revealing anything.
+
+    Parameters:
+        group (list): One group from split_components.
+        rules (sequence): The rules to use, as for deduce.
+
+    Returns:
+        tuple[set, set]: The cells found safe and the cells found mined.
+
+    Examples:
+        >>> a = (frozenset({(0, 0), (0, 1)}), 1)
+        >>> b = (frozenset({(0, 1), (0, 2)}), 2)
+        >>> c = (frozenset({(0, 0), (1, 0)}), 1)
+        >>> safe, mines = solve_group([a, b, c])
+        >>> sorted(safe), sorted(mines)
+        ([(0, 0)], [(0, 1), (0, 2), (1, 0)])
+    '''
+    rules = (single_cell_rule,) + tuple(rules)
+    all_safe = set()
+    all_mines = set()
+    while group:
+        for rule in rules:
+            safe, mines = rule(group)
+            if safe or mines:
+                break
+        else:
+            break
+        all_safe |= safe
+        all_mines |= mines
+        group = list({(cells - safe - mines, count - len(cells & mines))
+                      for cells, count in group if cells - safe - mines})
+    return all_safe, all_mines
+
+# Pools of solve_parallel by (workers, use_threads), kept for the next
+# call instead of starting new processes every time
+SOLVER_POOLS = {}
+
+def solver_pool(workers=None, use_threads: bool = False):
+    '''
+    Return the pool of solve_parallel for the given size, starting it
+    on first use.
+
+    Parameters:
+        workers (int or None): Pool size; None uses one per CPU.
+        use_threads (bool): Use threads instead of processes.
+
+    Returns:
+        concurrent.futures.Executor: The shared pool.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    key = (workers, use_threads)
+    pool = SOLVER_POOLS.get(key)
+    if pool is None:
+        if use_threads:
+            pool = concurrent.futures.ThreadPoolExecutor(workers)
+        else:
+            pool = concurrent.futures.ProcessPoolExecutor(workers)
+        SOLVER_POOLS[key] = pool
+    return pool
+
+def solve_parallel(board: list, left_click, right_click, state=None,
+                   workers=None, use_threads: bool = False,
+                   rules=CONSTRAINT_RULES):
+    '''
+    Run the bot like solve_constraints, but solve the independent
+    groups of the frontier in a pool of workers.
+
+    The frontier constraints are built and split with split_components
+    once, and every group goes whole to solve_group in the pool, which
+    applies the simple rules and the constraint rules until the group
+    gives nothing more. The safe cells and mines of all groups are then
+    clicked here. Only the groups next to a cell that changed are built
+    and sent again, since the others are already worked out; the bot
+    stops when no group finds anything.
+
+    Parameters:
+        board (2D list): The game board.
+        left_click (function): Called with (row, col) to reveal a cell.
+            It may return the list of cells it revealed.
+        right_click (function): Called with (row, col) to flag a cell.
+        state (GameState or None): Optional counts of the board, as
+            for solve.
+        workers (int or None): Pool size; None uses one per CPU and 1
+            solves every group in this process. The pool is kept by
+            solver_pool for later calls.
+        use_threads (bool): Use threads instead of processes.
+        rules (sequence): The rules to use, as for deduce.
+
+    Returns:
+        str: SOLVED if no hidden cell is left, STUCK otherwise.
+
+    Examples:
+        >>> helper_board = [[1, -1, 2, -1, 1], [1, 1, 2, 1, 1]]
+        >>> game_board = [['?'] * 5, ['1', '1', '2', '1', '1']]
+        >>> left = lambda r, c: reveal(helper_board, game_board, r, c)
+        >>> right = lambda r, c: flag(game_board, r, c)
+        >>> solve_parallel(game_board, left, right, workers=1)
+        'solved'
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = None if workers == 1 else solver_pool(workers, use_threads)
+    table = neighbour_table(len(board), len(board[0]))
+    groups = split_components(frontier_constraints(board))
+
+    while groups:
+        # Larger groups first so that no worker is left with a big one
+        # at the end; small groups travel to the processes in batches
+        groups.sort(key=len, reverse=True)
+        if pool is None:
+            results = [solve_group(group, rules) for group in groups]
+        else:
+            results = pool.map(solve_group, groups, itertools.repeat(rules),
+                               chunksize=max(1, len(groups) //
+                                             (4 * workers)))
+
+        safe = set()
+        mines = set()
+        for group_safe, group_mines in results:
+            safe |= group_safe
+            mines |= group_mines
+
+        changed = []
+        for r, c in sorted(safe):
+            if board[r][c] == HIDDEN_SYMBOL:
+                revealed = left_click(r, c)
+                changed.append((r, c))
+                if revealed:
+                    changed.extend(revealed)
+        for r, c in sorted(mines):
+            if board[r][c] == HIDDEN_SYMBOL:
+                right_click(r, c)
+                changed.append((r, c))
+
+        # Start again from the changed cells and their neighbours
+        around = set(changed)
+        for r, c in changed:
+            around.update((r + dr, c + dc) for dr, dc in table.steps(r, c))
+        groups = split_components(frontier_constraints(board, around))
+
+    if state is not None:
+        hidden = state.hidden
+    else:
+        hidden = count_total(board, HIDDEN_SYMBOL)
+    if hidden > 0:
+        return STUCK
+    return SOLVED
+
+def benchmark_parallel_solve(nb_rows: int = 200, nb_cols: int = 200,
+                             nb_mines=None, seed: int = 0,
+                             worker_counts=(1, 2, 4),
+                             use_threads: bool = False,
+                             nb_openings: int = 40):
+    '''
+    Time solve_parallel on the same board for several pool sizes.
+
+    The board is generated from the seed and opened with reveal_cascade
+    on several zero cells, which leaves many separate frontier groups.
+    Every pool is started before its run is timed.
+
+    Parameters:
+        nb_rows (int): Number of rows.
+        nb_cols (int): Number of columns.
+        nb_mines (int or None): Number of mines; MEDIUM if None.
+        seed (int): Seed of the board and of the openings.
+        worker_counts (sequence): Pool sizes to time.
+        use_threads (bool): Use threads instead of processes.
+        nb_openings (int): Zero cells revealed before solving.
+
+    Returns:
+        dict: For each pool size, the seconds taken, the speedup over
+        the first size and the solver result.
+    '''
+    if nb_mines is None:
+        nb_mines = int(MEDIUM_PERCENT * (nb_rows * nb_cols))
+    report = {}
+    baseline = None
+    for workers in worker_counts:
+        rng = random.Random(seed)
+        helper_board = generate_helper_board_fast(nb_rows, nb_cols,
+                                                  nb_mines, seed)
+        game_board = Board(nb_rows, nb_cols, HIDDEN_SYMBOL)
+        state = GameState(helper_board, game_board)
+        zeros = [i for i, code in enumerate(helper_board.cells) if code == 0]
+        for index in rng.sample(zeros, min(nb_openings, len(zeros))):
+            if game_board.cells[index] == HIDDEN_CODE:
+                state.reveal_cascade(*divmod(index, nb_cols))
+        if workers != 1:
+            pool = solver_pool(workers, use_threads)
+            list(pool.map(abs, range(4 * (workers or os.cpu_count() or 1))))
+
+        start = time.perf_counter()
+        result = solve_parallel(game_board, state.reveal_cascade, state.flag,
+                                state, workers, use_threads)
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline = seconds
+        report[workers] = {'seconds': seconds,
+                           'speedup': baseline / seconds if seconds else 0.0,
+                           'result': result}
+    return report
+
+
+# 19: No-guess boards
+
+# Verified boards, by (rows, cols, mines), then by (first click, seed);
+# the oldest are dropped first
+NO_GUESS_CACHE = {}
+
+def has_sealed_cell(helper_board):
+    '''
+    Check if a safe cell of a helper Board has only mines around it.
+    Such a cell can never be reached by logic, so the board needs a
+    guess; this check is much cheaper than running the solver.
+
+    Examples:
+        >>> has_sealed_cell(Board.from_list([[-1, 3], [-1, -1]]))
+        True
+        >>> has_sealed_cell(Board.from_list([[1, 1], [-1, 1]]))
+        False
+    '''
+    table = neighbour_table(helper_board.nb_rows, helper_board.nb_cols)
+    for r in range(helper_board.nb_rows):
+        start = r * helper_board.nb_cols
+        for c, code in enumerate(helper_board.cells[start:start +
+                                                    helper_board.nb_cols]):
+            if code != MINE_CODE and code == len(table.steps(r, c)):
+                return True
+    return False
+
+def solvable_without_guessing(helper_board, first_click: tuple):
+    '''
+    Check if the bot of solve_constraints clears a helper Board from
+    the first click without ever guessing.
+
+    Examples:
+        >>> board = Board.from_list([[0, 1, -1], [0, 1, 1], [0, 0, 0]])
+        >>> solvable_without_guessing(board, (2, 0))
+        True
+        >>> board = Board.from_list([[1, -1], [1, 1]])
+        >>> solvable_without_guessing(board, (1, 1))
+        False
+    '''
+    game_board = Board(helper_board.nb_rows, helper_board.nb_cols,
+                       HIDDEN_SYMBOL)
+    state = GameState(helper_board, game_board)
+    try:
+        state.reveal_cascade(*first_click)
+        return solve_constraints(game_board, state.reveal_cascade,
+                                 state.flag, state) == SOLVED
+    except AssertionError:
+        return False
+
+def generate_no_guess_board(nb_rows: int, nb_cols: int, nb_mines: int,
+                            first_click: tuple, seed=None,
+                            max_attempts: int = NO_GUESS_ATTEMPTS):
+    '''
+    Create a helper board that can be solved by logic alone from the
+    given first click.
+
+    Candidates keep the first click and its neighbours free of mines,
+    so the game opens on a zero. Each one goes through the cheap
+    has_sealed_cell filter before the full check of
+    solvable_without_guessing. Verified boards are kept in
+    NO_GUESS_CACHE: the same seeded request is answered from it at
+    once, and once NO_GUESS_POOL_SIZE boards are stored for a size and
+    first click, unseeded requests get one of them at random. At most
+    NO_GUESS_CACHE_SIZE boards are kept per size, for at most
+    NO_GUESS_CACHE_SIZES sizes.
+
+    Parameters:
+        nb_rows (int): Number of rows.
+        nb_cols (int): Number of columns.
+        nb_mines (int): Number of mines.
+        first_click (tuple[int, int]): The (row, col) revealed first.
+        seed (int or None): Seed for a reproducible board.
+        max_attempts (int): Candidates tried before giving up.
+
+    Returns:
+        Board: A copy of the verified helper board.
+
+    Raises:
+        ValueError: If no candidate passes within max_attempts.
+
+    Examples:
+        >>> board = generate_no_guess_board(9, 9, 10, (4, 4), seed=202)
+        >>> board[4][4], solvable_without_guessing(board, (4, 4))
+        (0, True)
+        >>> generate_no_guess_board(9, 9, 10, (4, 4), seed=202) == board
+        True
+    '''
+    key = (nb_rows, nb_cols, nb_mines)
+    if key not in NO_GUESS_CACHE:
+        if len(NO_GUESS_CACHE) >= NO_GUESS_CACHE_SIZES:
+            del NO_GUESS_CACHE[next(iter(NO_GUESS_CACHE))]
+        NO_GUESS_CACHE[key] = {}
+    boards = NO_GUESS_CACHE[key]
+    first_click = tuple(first_click)
+    if seed is not None and (first_click, seed) in boards:
+        return boards[(first_click, seed)].copy()
+    if seed is None:
+        pool = [board for (click, board_seed), board in boards.items()
+                if click == first_click]
+        if len(pool) >= NO_GUESS_POOL_SIZE:
+            return random.choice(pool).copy()
+        rng = random
+    else:
+        rng = random.Random(seed)
+
+    row, col = first_click
+    opening = [(row + dr, col + dc) for dr in (-1, 0, 1)
+               for dc in (-1, 0, 1)
+               if 0 <= row + dr < nb_rows and 0 <= col + dc < nb_cols]
+    for attempt in range(max_attempts):
+        candidate_seed = rng.getrandbits(64)
+        board = generate_helper_board_fast(nb_rows, nb_cols, nb_mines,
+                                           candidate_seed, opening)
+        if has_sealed_cell(board):
+            continue
+        if solvable_without_guessing(board, first_click):
+            if seed is None:
+                seed = candidate_seed
+            if len(boards) >= NO_GUESS_CACHE_SIZE:
+                del boards[next(iter(boards))]
+            boards[(first_click, seed)] = board
+            return board.copy()
+    raise ValueError("No board without guessing found in " +
+                     str(max_attempts) + " attempts.")
+
+
+# 20: Board history
+
+class CowRow:
+    '''
+    A row of a CowBoard. Reads go to the board's current row list, and
+    writes go through the board so a shared row is copied first.
+    '''
+
+    def __init__(self, board, row: int):
+        self.board = board
+        self.row = row
+
+    def __len__(self):
+        return len(self.board.rows[self.row])
+
+    def __iter__(self):
+        return iter(self.board.rows[self.row])
+
+    def __getitem__(self, col: int):
+        return self.board.rows[self.row][col]
+
+    def __setitem__(self, col: int, value):
+        self.board.write(self.row, col, value)
+
+
+class CowBoard:
+    '''
+    A game board whose rows are shared with its snapshots and branches
+    until they are written (copy on write).
+
+    Taking a snapshot or a branch only copies the list of row
+    references, and the first write to a shared row copies that row
+    alone, so keeping many versions of a board costs memory and time
+    in proportion to the rows that changed, not to the whole board.
+
+    Parameters:
+        board (2D list): Starting cells; they are copied.
+
+    Examples:
+        >>> board = CowBoard(init_board(2, 3, HIDDEN_SYMBOL))
+        >>> before = board.snapshot()
+        >>> board[0][1] = '2'
+        >>> board.to_list()
+        [['?', '2', '?'], ['?', '?', '?']]
+        >>> before[1] is board.rows[1]
+        True
+        >>> board.restore(before)
+        [(0, 1, '2', '?')]
+        >>> board.to_list()
+        [['?', '?', '?'], ['?', '?', '?']]
+    '''
+
+    def __init__(self, board):
+        self.rows = [list(row) for row in board]
+        # 1 for each row also referenced by a snapshot or a branch
+        self.shared = bytearray(len(self.rows))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return (CowRow(self, r) for r in range(len(self.rows)))
+
+    def __getitem__(self, row: int):
+        return CowRow(self, row)
+
+    def write(self, row: int, col: int, value):
+        '''
+        Set a cell, copying its row first if the row is shared.
+        '''
+        if self.shared[row]:
+            self.rows[row] = list(self.rows[row])
+            self.shared[row] = 0
+        self.rows[row][col] = value
+
+    def snapshot(self):
+        '''
+        Return the current version of the board as a tuple of rows.
+        The rows are shared, so they must not be changed directly.
+        '''
+        self.shared = bytearray(b"\x01") * len(self.rows)
+        return tuple(self.rows)
+
+    def restore(self, snapshot: tuple):
+        '''
+        Go back to a version returned by snapshot. Only the rows that
+        are no longer the snapshot's own rows are compared.
+
+        Parameters:
+            snapshot (tuple): A version returned by snapshot.
+
+        Returns:
+            list[tuple]: (row, col, old value, restored value) for every
+            cell that changed back.
+        '''
+        changes = []
+        for r, (now, then) in enumerate(zip(self.rows, snapshot)):
+            if now is not then:
+                changes.extend((r, c, old, new) for c, (old, new)
+                               in enumerate(zip(now, then)) if old != new)
+        self.rows = list(snapshot)
+        self.shared = bytearray(b"\x01") * len(self.rows)
+        return changes
+
+    def branch(self):
+        '''
+        Return a new CowBoard starting from the current cells, for
+        trying moves without touching this board.
+
+        Examples:
+            >>> board = CowBoard([['?', '?'], ['1', '?']])
+            >>> what_if = board.branch()
+            >>> what_if[0][0] = '1'
+            >>> board.to_list(), what_if.to_list()
+            ([['?', '?'], ['1', '?']], [['1', '?'], ['1', '?']])
+        '''
+        other = CowBoard(())
+        other.rows = list(self.snapshot())
+        other.shared = bytearray(b"\x01") * len(other.rows)
+        return other
+
+    def to_list(self):
+        '''
+        Return the cells as a new 2D list.
+        '''
+        return [list(row) for row in self.rows]
+
+
+class BoardHistory:
+    '''
+    Undo stack for a CowBoard. A checkpoint is taken before each move,
+    and undo restores the last one while keeping a GameState's counts
+    in step with the cells that changed back.
+
+    Parameters:
+        board (CowBoard): The game board.
+        state (GameState): Counts of the game, or None.
+
+    Examples:
+        >>> helper_board = [[0, 1], [1, -1]]
+        >>> game_board = CowBoard(init_board(2, 2, HIDDEN_SYMBOL))
+        >>> state = GameState(helper_board, game_board)
+        >>> history = BoardHistory(game_board, state)
+        >>> history.checkpoint()
+        >>> state.reveal(0, 0)
+        >>> history.checkpoint()
+        >>> state.flag(1, 1)
+        >>> history.undo()
+        [(1, 1)]
+        >>> history.undo()
+        [(0, 0)]
+        >>> state.hidden, state.flagged, state.unrevealed_safe
+        (4, 0, 3)
+        >>> history.undo()
+        []
+    '''
+
+    def __init__(self, board: CowBoard, state=None):
+        self.board = board
+        self.state = state
+        self.snapshots = []
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def checkpoint(self):
+        '''
+        Remember the current version of the board.
+        '''
+        self.snapshots.append(self.board.snapshot())
+
+    def undo(self):
+        '''
+        Go back to the last checkpoint.
+
+        Returns:
+            list[tuple[int, int]]: The (row, col) of every cell that
+            changed back, empty if there is nothing to undo.
+        '''
+        if not self.snapshots:
+            return []
+        changes = self.board.restore(self.snapshots.pop())
+        if self.state is not None:
+            for r, c, old, new in changes:
+                self.state.update(r, c, old)
+        return [(r, c) for r, c, old, new in changes]